@@ -7,6 +7,7 @@
 """
 import os
 import time
+import functools
 import json
 import networkx as nx
 import logging.config
@@ -22,6 +23,7 @@ from yafs.topology import Topology
 from yafs.distribution import *
 from yafs.application import fractional_selectivity
 from yafs.placement import JSONPlacement
+from yafs.runner import run_grid
 
 from customStrategy import CustomStrategy
 from jsonDynamicPopulation import DynamicPopulation
@@ -79,13 +81,13 @@ It controls the elimination of a node
 """
 
 def failureControl(sim,filelog,ids):
-    global idxFControl # WARNING! This global variable has to be reset in each simulation test
+    # ids is the list of nodes of this simulation, the removed node is consumed from it (there is no global state,
+    # so several simulations can run at the same time, see yafs.runner)
 
     nodes = list(sim.topology.G.nodes())
     if len(nodes)>1:
         try:
-            node_to_remove = ids[idxFControl]
-            idxFControl +=1
+            node_to_remove = ids.pop(0)
 
             keys_DES,someModuleDeployed = getProcessFromThatNode(sim, node_to_remove)
 
@@ -214,6 +216,13 @@ def main(simulated_time, path,pathResults,case,it):
 
 
 
+def experiment(case, seed, pathResults, simulated_time, path):
+    """
+    A run of :func:`yafs.runner.run_grid`, the seeds of random and numpy are set by the runner
+    """
+    main(simulated_time=simulated_time, path=path, pathResults=pathResults, case=case, it=seed)
+
+
 if __name__ == '__main__':
     import logging.config
 
@@ -239,18 +248,10 @@ if __name__ == '__main__':
     except OSError:
         None
 
-    # Multiple simulations
-    for i in range(nSimulations):
-        start_time = time.time()
-
-        random.seed(i)
-        np.random.seed(i)
-
-        logging.info("Running Conquest - %s" %pathExperimento)
-
-        main(simulated_time=timeSimulation, path=pathExperimento, pathResults=dname, case='CQ',it=i)
-
-        print("\n--- %s seconds ---" % (time.time() - start_time))
-        start_time = time.time()
+    # Multiple simulations, one for each seed, in a pool of processes
+    logging.info("Running Conquest - %s" %pathExperimento)
+    summary = run_grid(functools.partial(experiment, simulated_time=timeSimulation, path=pathExperimento),
+                       scenarios=["CQ"], seeds=range(nSimulations), results_path=dname)
+    print(summary[["run", "seed", "status", "elapsed"]])
 
     print("Simulation Done")
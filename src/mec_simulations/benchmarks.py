@@ -0,0 +1,243 @@
+import argparse
+import contextlib
+import io
+import logging
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import mec_application
+import placement_collection
+import toy_example
+from placement_evaluator import PlacementEvaluator
+from mec_simulations.simpleSelection import MinimunPath
+from yafs.core import Sim
+from yafs.topology import Topology
+from yafs.population import Statical
+from yafs.distribution import deterministic_distribution, trace_distribution, save_trace
+
+
+def create_synthetic_app_graph(num_modules, num_sources=None, extra_parent_prob=0.2, seed=1):
+    """
+    A random DAG of *num_modules* operators rooted at one user. Each module sends its result to a module created
+    before it (and sometimes to a second one), and the sources feed random modules.
+    """
+    rnd = random.Random(seed)
+    if num_sources is None:
+        num_sources = max(1, num_modules // 10)
+
+    raw_node_set = [{"module_id": "user", "type": "user", "consumptions": 10}]
+    raw_edge_set = []
+    for i in range(num_modules):
+        module_id = "O%i" % i
+        raw_node_set.append({"module_id": module_id, "type": "module", "consumptions": rnd.randint(10, 50)})
+        parents = ["user"] if i == 0 else ["O%i" % rnd.randrange(i)]
+        if i > 1 and rnd.random() < extra_parent_prob:
+            second_parent = "O%i" % rnd.randrange(i)
+            if second_parent not in parents:
+                parents.append(second_parent)
+        for parent_id in parents:
+            raw_edge_set.append({"edge_id": "M.%s.%s" % (module_id, parent_id), "parent_id": parent_id,
+                                 "child_id": module_id, "packet_size": rnd.randint(10, 1000)})
+
+    for i in range(num_sources):
+        source_id = "data_%i" % i
+        raw_node_set.append({"module_id": source_id, "type": "source", "consumptions": 0})
+        parent_id = "O%i" % rnd.randrange(num_modules)
+        raw_edge_set.append({"edge_id": "M.%s.%s" % (source_id, parent_id), "parent_id": parent_id,
+                             "child_id": source_id, "packet_size": rnd.randint(10, 1000)})
+
+    return mec_application.AppGraph("synthetic_app", raw_node_set, raw_edge_set)
+
+
+def bench_convert_to_yafs_app(num_modules):
+    start_time = time.time()
+    g = create_synthetic_app_graph(num_modules)
+    construct_time = time.time() - start_time
+
+    start_time = time.time()
+    yafs_app = g.convert_to_yafs_app(emission_interval=100)
+    convert_time = time.time() - start_time
+
+    num_in_messages = 0
+    for module in yafs_app.get_pure_modules():
+        message_names = [m.name for m in yafs_app.services[module]["message_in_list"]]
+        assert len(message_names) == len(set(message_names)), "repeated input messages in %s" % module
+        num_in_messages += len(message_names)
+    assert num_in_messages == len(g._raw_edge_set) - len(g.find_sink_edges())
+
+    print("AppGraph with %i modules and %i edges" % (num_modules, len(g._raw_edge_set)))
+    print("\tconstruction: %0.3f s" % construct_time)
+    print("\tconvert_to_yafs_app: %0.3f s" % convert_time)
+
+
+def run_toy_des(placement_result, results_path, emission_time=100):
+    """
+    It simulates one request of the toy application and returns its end-to-end latency
+    """
+    yafs_app = toy_example.create_toy_mec_app()
+    mec, topology_json, yafs_entity_id_name_map, server_info_map = toy_example.create_toy_topology()
+    t = Topology()
+    t.load(topology_json)
+    result = {module: server_info_map[server_id] for module, server_id in placement_result.items()}
+
+    placement = placement_collection.CustomStaticPlacement(name="Placement")
+    placement.preload_static_result(result)
+    pop = Statical("Statical")
+    pop.set_sink_control({"model": "user", "number": 1, "module": yafs_app.get_sink_modules()})
+    dDistribution = deterministic_distribution(name="Deterministic", time=emission_time)
+    pop.set_src_control({"model": "data_1", "number": 1, "message_out_list": [yafs_app.get_message("M.1.A")],
+                         "distribution": dDistribution})
+    pop.set_src_control({"model": "data_2", "number": 1, "message_out_list": [yafs_app.get_message("M.2.C")],
+                         "distribution": dDistribution})
+
+    s = Sim(t, default_results_path=results_path)
+    s.allocate_resources(yafs_app, result)
+    s.deploy_app2(yafs_app, placement, pop, MinimunPath())
+    with contextlib.redirect_stdout(io.StringIO()):
+        s.run(emission_time * 2 - 1)
+
+    df = pd.read_csv(results_path + ".csv")
+    return df[df.type == Sim.SINK_METRIC].time_reception.min() - emission_time
+
+
+def bench_placement_evaluator(num_placements, num_des_runs, seed=1):
+    rnd = random.Random(seed)
+    raw_node_set, raw_edge_set = toy_example.create_toy_mec_app_graph_data()
+    g = mec_application.AppGraph("vid_case", raw_node_set, raw_edge_set)
+    mec, _, _, _ = toy_example.create_toy_topology()
+
+    start_time = time.time()
+    evaluator = PlacementEvaluator(g, mec)
+    setup_time = time.time() - start_time
+
+    placements = [{m: rnd.choice(evaluator.server_ids) for m in evaluator.module_ids} for _ in range(num_placements)]
+    encoded = evaluator.encode(placements)
+    start_time = time.time()
+    latencies = evaluator.evaluate(encoded)
+    evaluation_time = time.time() - start_time
+
+    print("PlacementEvaluator with %i placements" % num_placements)
+    print("\tsetup: %0.3f s" % setup_time)
+    print("\tevaluation: %0.3f s (%0.2f us per placement)" % (evaluation_time,
+                                                              evaluation_time * 1000000 / num_placements))
+
+    logging.disable(logging.CRITICAL)
+    des_time = 0.0
+    errors = []
+    with tempfile.TemporaryDirectory() as folder:
+        for p in range(min(num_des_runs, num_placements)):
+            start_time = time.time()
+            des_latency = run_toy_des(placements[p], os.path.join(folder, "trace_%i" % p))
+            des_time += time.time() - start_time
+            errors.append(abs(latencies[p] - des_latency) / des_latency)
+            print("\t\tplacement %i: analytic %0.4f - DES %0.4f" % (p, latencies[p], des_latency))
+    logging.disable(logging.NOTSET)
+    if errors:
+        print("\tDES: %0.3f s per run, mean relative error %0.4f" % (des_time / len(errors), np.mean(errors)))
+
+
+def bench_deploy_modules(num_modules, seed=1):
+    """
+    Initial deployment of the modules of a synthetic DAG in the servers of the toy MEC: one by one with
+    Sim.deploy_module and in bulk with Sim.deploy_modules, with and without lazy consumers
+    """
+    rnd = random.Random(seed)
+    yafs_app = create_synthetic_app_graph(num_modules).convert_to_yafs_app(emission_interval=100)
+    _, topology_json, _, server_info_map = toy_example.create_toy_topology()
+    t = Topology()
+    t.load(topology_json)
+    servers = list(server_info_map.values())
+    placements = [(module, rnd.choice(servers)) for module in yafs_app.get_pure_modules()]
+
+    times = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for mode, lazy in (("deploy_module", False), ("deploy_modules", False), ("deploy_modules lazy", True)):
+            s = Sim(t, default_results_path=os.path.join(folder, mode), lazy_consumers=lazy)
+            s.deploy_app(yafs_app, placement_collection.CustomStaticPlacement(name="Placement"), MinimunPath())
+            start_time = time.time()
+            if mode == "deploy_module":
+                for module, id_node in placements:
+                    s.deploy_module(yafs_app.name, module, [yafs_app.services[module]], [id_node])
+            else:
+                s.deploy_modules(yafs_app.name, placements)
+            times[mode] = time.time() - start_time
+            s.metrics.close()
+
+    print("Deployment of %i modules" % len(placements))
+    for mode, elapsed in times.items():
+        print("\t%s: %0.3f s" % (mode, elapsed))
+
+
+def run_toy_trace_des(results_path, trace_path, until, checkpoint_at=None, seed=1):
+    """
+    It simulates the toy application with sources that replay a trace, in one run or stopped at *checkpoint_at* and
+    restored from the checkpoint
+    """
+    rnd = random.Random(seed)
+    yafs_app = toy_example.create_toy_mec_app()
+    _, topology_json, _, server_info_map = toy_example.create_toy_topology()
+    t = Topology()
+    t.load(topology_json)
+    result = {module: rnd.choice(list(server_info_map.values())) for module in yafs_app.get_pure_modules()}
+
+    placement = placement_collection.CustomStaticPlacement(name="Placement")
+    placement.preload_static_result(result)
+    pop = Statical("Statical")
+    pop.set_sink_control({"model": "user", "number": 1, "module": yafs_app.get_sink_modules()})
+    for k, (model, message) in enumerate([("data_1", "M.1.A"), ("data_2", "M.2.C")]):
+        distribution = trace_distribution(name="Trace", path=trace_path, offset=k * 500, count=500, block=64)
+        pop.set_src_control({"model": model, "number": 1, "message_out_list": [yafs_app.get_message(message)],
+                             "distribution": distribution})
+
+    s = Sim(t, default_results_path=results_path, checkpointing=checkpoint_at is not None)
+    s.allocate_resources(yafs_app, result)
+    s.deploy_app2(yafs_app, placement, pop, MinimunPath())
+    with contextlib.redirect_stdout(io.StringIO()):
+        if checkpoint_at is None:
+            s.run(until)
+        else:
+            s.run(checkpoint_at, checkpoint=results_path + ".checkpoint")
+            s = Sim.restore(results_path + ".checkpoint")
+            s.run(until)
+    return pd.read_csv(results_path + ".csv"), pd.read_csv(results_path + "_link.csv")
+
+
+def bench_checkpoint(until=20000, seed=1):
+    """
+    A run restored from a checkpoint (with trace-driven sources) writes the same events as an uninterrupted run
+    """
+    rng = np.random.default_rng(seed)
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as folder:
+        trace_path = os.path.join(folder, "sources.npy")
+        save_trace(trace_path, {"data_1": rng.exponential(40, 500), "data_2": rng.exponential(60, 500)})
+        start_time = time.time()
+        events, links = run_toy_trace_des(os.path.join(folder, "full"), trace_path, until)
+        full_time = time.time() - start_time
+        print("Checkpoint of the toy application with trace-driven sources")
+        print("\tuninterrupted: %0.3f s" % full_time)
+        for checkpoint_at in (until * 0.25 + 0.3, until * 0.5 + 3.5):
+            start_time = time.time()
+            r_events, r_links = run_toy_trace_des(os.path.join(folder, "restored"), trace_path, until, checkpoint_at)
+            assert events.equals(r_events) and links.equals(r_links), "the restored run differs at %s" % checkpoint_at
+            print("\tcheckpoint at %0.1f and restore: %0.3f s, %i events" % (checkpoint_at, time.time() - start_time,
+                                                                          len(r_events)))
+    logging.disable(logging.NOTSET)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks of the MEC simulation tools")
+    parser.add_argument("--modules", type=int, default=5000, help="number of modules of the synthetic DAG")
+    parser.add_argument("--placements", type=int, default=100000, help="number of placements evaluated at once")
+    parser.add_argument("--des", type=int, default=10, help="number of placements also simulated with the DES")
+    args = parser.parse_args()
+
+    bench_convert_to_yafs_app(args.modules)
+    bench_placement_evaluator(args.placements, args.des)
+    bench_deploy_modules(args.modules)
+    bench_checkpoint()
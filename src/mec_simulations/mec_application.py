@@ -52,9 +52,37 @@ class AppGraph:
         self._raw_edge_set = edge_set
         self.node_obj_set = []
         self.nx_graph = None
+        self.build_indexes()
         self.construct_nx_graph()
         self.construct()
 
+    def build_indexes(self):
+        # module_id -> node
+        self._node_index = {}
+        for n in self._raw_node_set:
+            self._node_index.setdefault(n["module_id"], n)
+        self._source_ids = [n["module_id"] for n in self._raw_node_set if n["type"] == "source"]
+        self._user_ids = [n["module_id"] for n in self._raw_node_set if n["type"] == "user"]
+
+        # (child_id, parent_id) -> edge, both orientations are indexed
+        self._edge_index = {}
+        # module_id -> edges whose messages arrive at (in) or leave from (out) the module
+        self._in_edges = {n_id: [] for n_id in self._node_index}
+        self._out_edges = {n_id: [] for n_id in self._node_index}
+        for e in self._raw_edge_set:
+            self._edge_index.setdefault((e["child_id"], e["parent_id"]), e)
+            self._edge_index.setdefault((e["parent_id"], e["child_id"]), e)
+            self._in_edges.setdefault(e["parent_id"], []).append(e)
+            self._out_edges.setdefault(e["child_id"], []).append(e)
+
+    def find_in_edges(self, module_id: str):
+        """edges whose messages are received by the module"""
+        return self._in_edges.get(module_id, [])
+
+    def find_out_edges(self, module_id: str):
+        """edges whose messages are sent by the module"""
+        return self._out_edges.get(module_id, [])
+
     def construct_nx_graph(self):
         self.nx_graph = nx.DiGraph()
         for n in self._raw_node_set:
@@ -68,67 +96,46 @@ class AppGraph:
         return node
 
     def find_module_type_by_id(self, module_id: str):
-        for n in self._raw_node_set:
-            if n["module_id"] == module_id:
-                return n["type"]
-        raise ValueError(f"module id {module_id} not found")
+        try:
+            return self._node_index[module_id]["type"]
+        except KeyError:
+            raise ValueError(f"module id {module_id} not found")
 
     def find_user_id(self):
-        for n in self._raw_node_set:
-            if n["type"] == "user":
-                return n["module_id"]
-        raise ValueError(f"no user found")
+        if not self._user_ids:
+            raise ValueError(f"no user found")
+        return self._user_ids[0]
 
     def find_source_ids(self):
-        source_ids = []
-        for n in self._raw_node_set:
-            if n["type"] == "source":
-                source_ids.append(n["module_id"])
-        return source_ids
+        return list(self._source_ids)
 
     def find_source_edges(self):
-        source_edges = []
-        for e in self._raw_edge_set:
-            if e["child_id"] in self.find_source_ids():
-                source_edges.append(e)
-        return source_edges
+        source_ids = set(self._source_ids)
+        return [e for e in self._raw_edge_set if e["child_id"] in source_ids]
 
     def find_sink_edges(self):
-        sink_edges = []
-        for e in self._raw_edge_set:
-            if e["parent_id"] == self.find_user_id():
-                sink_edges.append(e)
-        return sink_edges
+        return list(self._in_edges.get(self.find_user_id(), []))
 
     def find_module_consumption_by_id(self, module_id: str):
-        for n in self._raw_node_set:
-            if n["module_id"] == module_id:
-                return n["consumptions"]
-        raise ValueError(f"module id {module_id} not found")
+        try:
+            return self._node_index[module_id]["consumptions"]
+        except KeyError:
+            raise ValueError(f"module id {module_id} not found")
 
     def find_source_edge_id_set_by_source_id(self, source_id: str):
-        source_edge_id_set = []
-        for e in self._raw_edge_set:
-            if e["child_id"] == source_id:
-                # return e["edge_id"]
-                source_edge_id_set.append(e["edge_id"])
+        source_edge_id_set = [e["edge_id"] for e in self._out_edges.get(source_id, [])]
         if len(source_edge_id_set) == 0:
             raise ValueError(f"edge not found")
         return source_edge_id_set
 
     def find_edge_by_src_and_dst_id(self, src_module_id, dst_module_id):
-        for e in self._raw_edge_set:
-            if e["child_id"] == src_module_id and e["parent_id"] == dst_module_id:
-                return e
-            elif e["parent_id"] == src_module_id and e["child_id"] == dst_module_id:
-                return e
-        raise ValueError(f"edge not found")
+        try:
+            return self._edge_index[(src_module_id, dst_module_id)]
+        except KeyError:
+            raise ValueError(f"edge not found")
 
     def construct(self):
-        # first convert node_set to a dict
-        raw_node_dict = {}
-        for n in self._raw_node_set:
-            raw_node_dict[n["module_id"]] = n
+        raw_node_dict = self._node_index
         obj_node_dict = {}
         # then traverse all edges to create node obj and construct graph
         for e in self._raw_edge_set:
@@ -182,50 +189,33 @@ class AppGraph:
 
         app.set_modules(modules)
 
-        # set messages and add service modules
-        source_messages = []
-        service_messages = []
+        # set messages and add service modules, one message for each edge
+        in_messages = {}
+        source_in_messages = {}
+        out_messages = {}
         for edge in self._raw_edge_set:
             t_instructions = self.find_module_consumption_by_id(edge["parent_id"])
             t_message = yafs.Message(edge["edge_id"], edge["child_id"], edge["parent_id"], instructions=t_instructions,
                                      bytes=edge["packet_size"])
             if self.find_module_type_by_id(edge["child_id"]) == "source":
                 app.add_source_messages(t_message)
-                source_messages.append(t_message)
+                # messages from sources are listed after the service messages
+                source_in_messages.setdefault(edge["parent_id"], []).append(t_message)
             else:
-                service_messages.append(t_message)
+                in_messages.setdefault(edge["parent_id"], []).append(t_message)
+            out_messages.setdefault(edge["child_id"], []).append(t_message)
 
         for node in self._raw_node_set:
-            t_in_messages = []
-            # t_out_message = None
-            t_out_messages = []
+            module_id = node["module_id"]
             if node["type"] == "module":
-                for t_service_message in service_messages:
-                    if t_service_message.dst == node["module_id"]:
-                        t_in_messages.append(t_service_message)
-                    elif t_service_message.src == node["module_id"]:
-                        # t_out_message = t_service_message
-                        t_out_messages.append(t_service_message)
-
-                    for t_source_message in source_messages:
-                        if t_source_message.dst == node["module_id"]:
-                            t_in_messages.append(t_source_message)
-
-                app.add_service_module(node["module_id"], t_in_messages, t_out_messages,
-                                           yafs.application.fractional_selectivity, threshold=1.0)
+                t_in_messages = in_messages.get(module_id, []) + source_in_messages.get(module_id, [])
+                app.add_service_module(module_id, t_in_messages, out_messages.get(module_id, []),
+                                       yafs.application.fractional_selectivity, threshold=1.0)
             elif node["type"] == "source":
                 distribution = yafs.distribution.deterministic_distribution(name="Deterministic",
                                                                             time=emission_interval)
                 # distribution = yafs.distribution.oneoffDistribution(name="Deterministic", time=10)
-                for t_service_message in service_messages:
-                    if t_service_message.src == node["module_id"]:
-                        t_out_messages.append(t_service_message)
-                app.add_service_source(node["module_id"], distribution, message_out_list=t_out_messages)
-            # for t_in_message in t_in_messages:
-            #     for t_out_message in t_out_messages:
-            #         app.add_service_module(node["module_id"], t_in_message, t_out_message,
-            #                                yafs.application.fractional_selectivity, threshold=1.0)
-            #         #  check the fraction?
+                app.add_service_source(module_id, distribution, message_out_list=out_messages.get(module_id, []))
 
         return app
 
@@ -0,0 +1,129 @@
+def default_power_model(server, active_slots):
+    return server.calculate_power(active_slots)
+
+
+class MECEnergyModel(object):
+    """
+    Event-driven energy accounting of the MEC servers and the MDC batteries.
+
+    The simulator notifies the start and the end of each processing (see :meth:`yafs.core.Sim.deploy_energy_model`).
+    Between two notifications the power of a server and the net power of its MDC are constant, so the energy is
+    integrated exactly at those instants and nothing is polled.
+
+    Args:
+        mec (MEC): the MEC environment; the *energy_stored* of each MDC is updated in place
+
+        server_id_entity_id_map (dict): server.server_id -> topology entity id (see MEC.convert_to_yafs_topology)
+
+    Kwargs:
+        power_model (function): f(server, active_slots) -> power. By default: Server.calculate_power
+    """
+
+    def __init__(self, mec, server_id_entity_id_map, power_model=None):
+        self.mec = mec
+        self.power_model = power_model
+        if power_model is None:
+            self.power_model = default_power_model
+
+        self.server_energy = {}
+        # entity id -> energy consumed by the server
+        self.mdc_energy = {}
+        # mdc id -> energy consumed by all the servers of the MDC
+        self.mdc_deficit = {}
+        # mdc id -> energy demanded while the battery was empty
+
+        self._servers = {}
+        self._server_mdc = {}
+        self._active_slots = {}
+        self._server_power = {}
+        self._server_last_update = {}
+        for mdc in mec.mdc_list:
+            self.mdc_energy[mdc.mdc_id] = 0.0
+            self.mdc_deficit[mdc.mdc_id] = 0.0
+            for server in mdc.servers:
+                entity_id = server_id_entity_id_map[server.server_id]
+                self._servers[entity_id] = server
+                self._server_mdc[entity_id] = mdc.mdc_id
+                self._active_slots[entity_id] = 0
+                self._server_power[entity_id] = self.power_model(server, 0)
+                self._server_last_update[entity_id] = 0.0
+                self.server_energy[entity_id] = 0.0
+
+        self._mdcs = {mdc.mdc_id: mdc for mdc in mec.mdc_list}
+        self._mdc_power = {mdc_id: 0.0 for mdc_id in self._mdcs}
+        for entity_id, mdc_id in self._server_mdc.items():
+            self._mdc_power[mdc_id] += self._server_power[entity_id]
+        self._mdc_last_update = {mdc_id: 0.0 for mdc_id in self._mdcs}
+
+    def __advance_server(self, entity_id, now):
+        dt = now - self._server_last_update[entity_id]
+        if dt > 0:
+            self.server_energy[entity_id] += self._server_power[entity_id] * dt
+            self._server_last_update[entity_id] = now
+
+    def __advance_mdc(self, mdc_id, now):
+        dt = now - self._mdc_last_update[mdc_id]
+        if dt > 0:
+            mdc = self._mdcs[mdc_id]
+            power = self._mdc_power[mdc_id]
+            self.mdc_energy[mdc_id] += power * dt
+            stored = mdc.energy_stored + (mdc.charging_rate - power) * dt
+            if stored < 0:
+                self.mdc_deficit[mdc_id] -= stored
+                stored = 0
+            mdc.energy_stored = min(stored, mdc.battery_capacity)
+            self._mdc_last_update[mdc_id] = now
+
+    def __update_slots(self, entity_id, now, delta):
+        if entity_id not in self._servers:
+            # gateways, base stations, users or data sources
+            return
+        mdc_id = self._server_mdc[entity_id]
+        self.__advance_server(entity_id, now)
+        self.__advance_mdc(mdc_id, now)
+
+        self._active_slots[entity_id] += delta
+        power = self.power_model(self._servers[entity_id], self._active_slots[entity_id])
+        self._mdc_power[mdc_id] += power - self._server_power[entity_id]
+        self._server_power[entity_id] = power
+
+    def processing_start(self, entity_id, now):
+        """
+        Invoked by the simulator when a module starts a processing in the entity
+        """
+        self.__update_slots(entity_id, now, 1)
+
+    def processing_stop(self, entity_id, now):
+        """
+        Invoked by the simulator when a module ends a processing in the entity
+        """
+        self.__update_slots(entity_id, now, -1)
+
+    def battery_level(self, mdc_id, now):
+        """
+        Returns:
+            the energy stored in the battery of the MDC at time *now*, it does not modify the accounting
+        """
+        mdc = self._mdcs[mdc_id]
+        dt = now - self._mdc_last_update[mdc_id]
+        stored = mdc.energy_stored + (mdc.charging_rate - self._mdc_power[mdc_id]) * dt
+        return min(max(stored, 0), mdc.battery_capacity)
+
+    def server_power(self, entity_id):
+        """
+        Returns:
+            the current power of the server deployed in the topology entity
+        """
+        return self._server_power[entity_id]
+
+    def active_slots(self, entity_id):
+        return self._active_slots[entity_id]
+
+    def close(self, now):
+        """
+        Integrates the energy of all the servers and MDCs until *now*
+        """
+        for entity_id in self._servers:
+            self.__advance_server(entity_id, now)
+        for mdc_id in self._mdcs:
+            self.__advance_mdc(mdc_id, now)
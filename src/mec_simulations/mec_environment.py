@@ -10,7 +10,7 @@ class Server(object):
 
     def __init__(self, server_id, server_name, mdc_id, mem, frequency, device_factor,
                  num_of_slot=1,
-                 availability=1):
+                 availability=1, power_min=0, power_max=0):
         self.server_id = server_id
         self.server_name = server_name
         self.mdc_id = mdc_id
@@ -21,18 +21,20 @@ class Server(object):
         self.availability = availability
         self.num_of_slot = num_of_slot
         # self.power = power
-        # self.power_min = power_min
-        # self.power_max = power_max
-
-    # def calculate_energy(self, active_slots, max_slots, time_period):
-    #     # dynamic energy consumption
-    #     operating_freq = self.frequency * active_slots / max_slots
-    #     return self.device_factor * time_period * (operating_freq ** 3)
-    #
-    # def calculate_power(self, active_slots):
-    #     # dynamic power consumption
-    #     operating_freq = self.frequency * active_slots / self.num_of_slot
-    #     return self.device_factor * (operating_freq ** 3)
+        self.power_min = power_min
+        self.power_max = power_max
+        # idle and full-load power of the linear model (see yafs.stats.Stats.energy_report)
+
+    def calculate_energy(self, active_slots, time_period):
+        # dynamic energy consumption
+        return self.calculate_power(active_slots) * time_period
+
+    def calculate_power(self, active_slots):
+        # dynamic power consumption, the operating frequency grows with the busy slots
+        if self.num_of_slot == 0:
+            return 0
+        operating_freq = self.frequency * min(active_slots, self.num_of_slot) / self.num_of_slot
+        return self.device_factor * (operating_freq ** 3)
 
     def get_id(self):
         return self.server_id
@@ -244,6 +246,14 @@ class MEC(object):
                     return mdc.mdc_id
         raise ValueError
 
+    def map_entities_to_mdc(self, server_id_entity_id_map):
+        """
+        Returns:
+            a dict topology entity id -> mdc id of the servers (see convert_to_yafs_topology)
+        """
+        return {server_id_entity_id_map[server.server_id]: mdc.mdc_id
+                for mdc in self.mdc_list for server in mdc.servers}
+
     def get_server_list(self):
         server_list = []
         for mdc in self.mdc_list:
@@ -338,8 +348,8 @@ class MEC(object):
                 t_server = {"id": entity_id_index, "model": server.server_id, "mytag": "server",
                             "IPT": server.frequency,
                             "RAM": server.mem, "COST": 0,
-                            "POWERmin": 0,
-                            "POWERmax": 0,
+                            "POWERmin": server.power_min,
+                            "POWERmax": server.power_max,
                             "slot": server.num_of_slot}
                 topology_json["entity"].append(t_server)
                 yafs_entity_id_name_map[entity_id_index] = server.server_id
@@ -14,12 +14,7 @@ class CustomStaticPlacement(Placement):
         if not self._static_result:
             print('Results from dsp_app must be preloaded first')
             exit(1)
-        for key in self._static_result:
-            module = key
-            idtopo = self._static_result[key]
-            app = sim.apps[app_name]
-            services = app.services
-            idDES = sim.deploy_module(app_name, module, [services[module]], [idtopo])
+        sim.deploy_modules(app_name, list(self._static_result.items()))
 
 class JSONPlacement(Placement):
     def __init__(self, json, **kwargs):
@@ -27,12 +22,7 @@ class JSONPlacement(Placement):
         self.data = json
 
     def initial_allocation(self, sim, app_name):
-        for item in self.data["initialAllocation"]:
-            if app_name == item["app"]:
-                # app_name = item["app"]
-                module = item["module_name"]
-                idtopo = item["id_resource"]
-                app = sim.apps[app_name]
-                services = app.services
-                idDES = sim.deploy_module(app_name, module, services[module], [idtopo])
+        placements = [(item["module_name"], item["id_resource"]) for item in self.data["initialAllocation"]
+                      if app_name == item["app"]]
+        sim.deploy_modules(app_name, placements)
 
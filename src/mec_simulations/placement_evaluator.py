@@ -0,0 +1,172 @@
+import math
+
+import networkx as nx
+import numpy as np
+
+
+class PlacementEvaluator(object):
+    """
+    Analytic evaluation of the end-to-end latency of an AppGraph deployed in a MEC without running the DES.
+
+    It follows the model of the simulation: a message crosses the links of the shortest path among the entities
+    (bytes / (BW * 10^6) + PR for each link) and a module waits for all its input messages (critical path) to process
+    their instructions at the server frequency shared by the modules deployed in the same server
+    (see Sim.allocate_resources). Link queues are not considered.
+
+    All the placements of a batch are evaluated at once with NumPy.
+
+    Args:
+        app_graph (AppGraph): the application
+
+        mec (MEC): the environment
+    """
+
+    def __init__(self, app_graph, mec):
+        self.app_graph = app_graph
+        self.mec = mec
+
+        self.server_ids = [server.server_id for server in mec.get_server_list()]
+        self.server_index = {server_id: i for i, server_id in enumerate(self.server_ids)}
+        self.module_ids = [n["module_id"] for n in app_graph._raw_node_set if n["type"] == "module"]
+        self.module_index = {module_id: i for i, module_id in enumerate(self.module_ids)}
+
+        mdc_ids = [mdc.mdc_id for mdc in mec.mdc_list]
+        mdc_index = {mdc_id: i for i, mdc_id in enumerate(mdc_ids)}
+        self.hops, per_byte, propagation = self.__gateway_matrices(mec, mdc_ids)
+
+        # access links (entity <-> gateway) of each MDC
+        access_per_byte = np.array([1.0 / (mec.find_bw(m, m) * 1000000.0) for m in mdc_ids])
+        bs_propagation = np.array([mec.find_pr(m, m) for m in mdc_ids], dtype=float)
+
+        server_mdc = np.array([mdc_index[mec.locate_server(s)] for s in self.server_ids])
+        self.server_frequency = np.array([float(mec.get_server_frequency_by_id(s)) for s in self.server_ids])
+
+        # server -> server
+        self.ss_per_byte = access_per_byte[server_mdc][:, None] + per_byte[np.ix_(server_mdc, server_mdc)] + \
+            access_per_byte[server_mdc][None, :]
+        self.ss_propagation = propagation[np.ix_(server_mdc, server_mdc)].copy()
+        np.fill_diagonal(self.ss_per_byte, 0.0)
+        np.fill_diagonal(self.ss_propagation, 0.0)
+
+        # source -> server
+        self.source_per_byte = {}
+        self.source_propagation = {}
+        for source_id in app_graph.find_source_ids():
+            m = mdc_index[mec.locate_data_source(source_id)]
+            self.source_per_byte[source_id] = access_per_byte[m] + per_byte[m, server_mdc] + \
+                access_per_byte[server_mdc]
+            self.source_propagation[source_id] = propagation[m, server_mdc]
+
+        # server -> user: gateway -> base station -> user
+        self.user_id = app_graph.find_user_id()
+        m = mdc_index[mec.locate_user_device(self.user_id)]
+        self.user_per_byte = access_per_byte[server_mdc] + per_byte[server_mdc, m] + 2 * access_per_byte[m]
+        self.user_propagation = propagation[server_mdc, m] + bs_propagation[m]
+
+        self.__order = [n for n in nx.topological_sort(app_graph.nx_graph)]
+
+    @staticmethod
+    def __gateway_matrices(mec, mdc_ids):
+        """
+        Hops, sum of 1/BW and sum of PR of the shortest paths among the MDC gateways of the YAFS topology
+        """
+        topology_json, yafs_entity_id_name_map, _ = mec.convert_to_yafs_topology()
+        G = nx.Graph()
+        for link in topology_json["link"]:
+            G.add_edge(link["s"], link["d"], BW=link["BW"], PR=link["PR"])
+        name_entity_id_map = {name: entity_id for entity_id, name in yafs_entity_id_name_map.items()}
+        gateways = [name_entity_id_map[mdc_id] for mdc_id in mdc_ids]
+
+        n = len(mdc_ids)
+        hops = np.zeros((n, n), dtype=int)
+        per_byte = np.zeros((n, n))
+        propagation = np.zeros((n, n))
+        for i, src in enumerate(gateways):
+            paths = nx.single_source_shortest_path(G, src)
+            for j, dst in enumerate(gateways):
+                path = paths[dst]
+                hops[i, j] = len(path) - 1
+                for a, b in zip(path[:-1], path[1:]):
+                    per_byte[i, j] += 1.0 / (G.edges[a, b]["BW"] * 1000000.0)
+                    propagation[i, j] += G.edges[a, b]["PR"]
+        return hops, per_byte, propagation
+
+    def encode(self, placements):
+        """
+        Args:
+            placements (list): a list of dicts module_id -> server_id
+
+        Returns:
+            an int array (placements x modules) of server indexes, the columns follow *module_ids*
+        """
+        result = np.empty((len(placements), len(self.module_ids)), dtype=int)
+        for p, placement in enumerate(placements):
+            for module_id, server_id in placement.items():
+                result[p, self.module_index[module_id]] = self.server_index[server_id]
+        return result
+
+    def processing_times(self, placements):
+        """
+        Returns:
+            a float array (placements x modules) with the service time of each module
+        """
+        placements = np.asarray(placements)
+        num_placements, num_modules = placements.shape
+        num_servers = len(self.server_ids)
+
+        # multi-tenancy: number of modules in the same server
+        offsets = np.arange(num_placements)[:, None] * num_servers
+        tenants = np.bincount((placements + offsets).ravel(), minlength=num_placements * num_servers)
+        tenants = tenants.reshape(num_placements, num_servers)
+        n = np.take_along_axis(tenants, placements, axis=1).astype(float)
+        overhead = 1 + np.log(n) / 2
+
+        # a module processes the instructions of all its input messages
+        instructions = np.array([len(self.app_graph.find_in_edges(m)) * self.app_graph.find_module_consumption_by_id(m)
+                                 for m in self.module_ids], dtype=float)
+        return instructions[None, :] * overhead * n / self.server_frequency[placements]
+
+    def evaluate(self, placements):
+        """
+        Args:
+            placements (array): server indexes (placements x modules), see :meth:`encode`
+
+        Returns:
+            a float array with the end-to-end latency (emission in the sources -> reception in the user) of each
+            placement
+        """
+        placements = np.asarray(placements)
+        processing = self.processing_times(placements)
+        num_placements = placements.shape[0]
+
+        finish = {}
+        arrival = None
+        for module_id in self.__order:
+            module_type = self.app_graph.find_module_type_by_id(module_id)
+            if module_type == "source":
+                # all sources emit at the same time
+                continue
+
+            ready = np.full(num_placements, -math.inf)
+            for edge in self.app_graph.find_in_edges(module_id):
+                src_id = edge["child_id"]
+                size = edge["packet_size"]
+                if self.app_graph.find_module_type_by_id(src_id) == "source":
+                    dst = placements[:, self.module_index[module_id]]
+                    t = size * self.source_per_byte[src_id][dst] + self.source_propagation[src_id][dst]
+                else:
+                    src = placements[:, self.module_index[src_id]]
+                    if module_type == "user":
+                        t = size * self.user_per_byte[src] + self.user_propagation[src]
+                    else:
+                        dst = placements[:, self.module_index[module_id]]
+                        t = size * self.ss_per_byte[src, dst] + self.ss_propagation[src, dst]
+                    t = finish[src_id] + t
+                np.maximum(ready, t, out=ready)
+
+            if module_type == "user":
+                arrival = ready
+            else:
+                finish[module_id] = ready + processing[:, self.module_index[module_id]]
+
+        return arrival
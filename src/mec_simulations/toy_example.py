@@ -16,11 +16,9 @@ from mec_simulations import mec_environment
 from mec_simulations.simpleSelection import MinimunPath
 from yafs.distribution import deterministic_distribution
 from yafs.application import fractional_selectivity
-import placement_collection, mec_application
+import placement_collection, mec_application, mec_energy
 
-def create_toy_mec_app():
-    # manually configure the application
-    app_name = "vid_case"
+def create_toy_mec_app_graph_data():
     raw_node_set = [
         {"module_id": "user", "type": "user", "consumptions": 10},
         {"module_id": "service_a", "type": "module", "consumptions": 20},
@@ -39,6 +37,13 @@ def create_toy_mec_app():
         {"edge_id": "M.C.D", "parent_id": "service_d", "child_id": "service_c", "packet_size": 100},
         {"edge_id": "M.D.U", "parent_id": "user", "child_id": "service_d", "packet_size": 1000},
     ]
+    return raw_node_set, raw_edge_set
+
+
+def create_toy_mec_app():
+    # manually configure the application
+    app_name = "vid_case"
+    raw_node_set, raw_edge_set = create_toy_mec_app_graph_data()
 
     g = mec_application.AppGraph(app_name, raw_node_set, raw_edge_set)
     yafs_app = g.convert_to_yafs_app()
@@ -163,10 +168,14 @@ def main(simulated_time):
     selectorPath = MinimunPath()
     s.allocate_resources(yafs_app, random_result)
     s.deploy_app2(yafs_app, placement, pop, selectorPath)
+    energy_model = mec_energy.MECEnergyModel(mec, server_info_map)
+    s.deploy_energy_model(energy_model)
 
     # s.run(stop_time, test_initial_deploy=True)
     s.run(stop_time, show_progress_monitor=False)
     s.print_debug_assignaments()
+    for mdc in mec.mdc_list:
+        print(mdc.mdc_id, "battery:", mdc.energy_stored, "consumed:", energy_model.mdc_energy[mdc.mdc_id])
 
 
 if __name__ == '__main__':
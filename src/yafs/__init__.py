@@ -14,7 +14,8 @@ from yafs.selection import Selection,OneRandomPath,First_ShortestPath
 from yafs.topology import Topology
 from yafs.population import Population,Statical
 from yafs.application import Application, Message
-from yafs.metrics import Metrics
+from yafs.metrics import Metrics, RecordingPolicy
+from yafs.aggregation import MetricsAggregator, MSER5, BatchMeans
 from yafs.distribution import *
 
 def compile_toc(entries, section_marker='='):
@@ -38,8 +39,8 @@ toc = (
     ('Population', [Population, Statical]),
     ('Placement', [Placement,ClusterPlacement]),
     ('Selection', [Selection,OneRandomPath,First_ShortestPath]),
-    ('Metrics', [Metrics]),
-    ('Distribution',[Distribution,deterministic_distribution,exponential_distribution])
+    ('Metrics', [Metrics, MetricsAggregator, RecordingPolicy, MSER5, BatchMeans]),
+    ('Distribution',[Distribution,deterministic_distribution,exponential_distribution,BufferedDistribution])
 )
 
 
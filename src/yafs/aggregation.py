@@ -0,0 +1,450 @@
+"""
+Online aggregation of the simulation events. The summaries are updated with each event, so long simulations can be
+analysed with constant memory and without writing the raw traces (see :class:`yafs.metrics.Metrics`).
+"""
+import math
+from statistics import NormalDist
+
+
+class RunningStat(object):
+    """
+    Count, sum, minimum, maximum, mean and variance (Welford's algorithm) of a series of values
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """
+        It combines the values of other RunningStat (i.e. from other simulation) into this one
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self):
+        if self.count < 2:
+            return math.nan
+        return self.m2 / (self.count - 1)
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.sum, "mean": self.mean if self.count else math.nan,
+                "std": self.std(), "min": self.min, "max": self.max}
+
+
+class LogHistogram(object):
+    """
+    A streaming quantile sketch similar to a HDR histogram: the values are counted in logarithmic buckets, so any
+    quantile is estimated with a relative error lower than *precision*.
+
+    Args:
+        precision (float): relative error of the estimations
+
+        lowest (float): values lower than it are counted in the zero bucket
+    """
+
+    def __init__(self, precision=0.01, lowest=1e-9):
+        self.precision = precision
+        self.lowest = lowest
+        self.__log_base = math.log1p(2 * precision)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value < self.lowest:
+            self.zeros += 1
+        else:
+            index = int(math.log(value / self.lowest) / self.__log_base)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.zeros += other.zeros
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+
+    def quantile(self, q):
+        """
+        Args:
+            q (float): between 0 and 1
+
+        Returns:
+            the estimated value of the quantile
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # middle point of the bucket
+                return self.lowest * math.exp((index + 0.5) * self.__log_base)
+        return self.lowest * math.exp((max(self.buckets) + 0.5) * self.__log_base)
+
+
+class MetricsAggregator(object):
+    """
+    It summarises the events recorded by :class:`yafs.metrics.Metrics` while the simulation runs:
+
+        - the response time (*time_out - time_emit*) of each message: running stats and a quantile sketch
+
+        - the service time of each DES process
+
+        - the bytes and messages transmitted by each link
+
+        - the peak of messages in transmission (buffer)
+
+    Kwargs:
+        precision (float): relative error of the quantiles
+    """
+
+    def __init__(self, precision=0.01):
+        self.precision = precision
+        self.message_response = {}
+        # message name -> RunningStat
+        self.message_quantiles = {}
+        # message name -> LogHistogram
+        self.des_service = {}
+        # DES.dst -> RunningStat
+        self.link_bytes = {}
+        # (src, dst) -> [bytes, messages]
+        self.buffer_peak = 0
+        self.events = 0
+        self.link_events = 0
+
+    def insert(self, value):
+        self.events += 1
+        message = value["message"]
+        response = value["time_out"] - value["time_emit"]
+        try:
+            self.message_response[message].add(response)
+            self.message_quantiles[message].add(response)
+        except KeyError:
+            self.message_response[message] = RunningStat()
+            self.message_response[message].add(response)
+            self.message_quantiles[message] = LogHistogram(self.precision)
+            self.message_quantiles[message].add(response)
+
+        des = value["DES.dst"]
+        if des not in self.des_service:
+            self.des_service[des] = RunningStat()
+        self.des_service[des].add(value["service"])
+
+    def insert_link(self, value):
+        self.link_events += 1
+        link = (value["src"], value["dst"])
+        try:
+            totals = self.link_bytes[link]
+            totals[0] += value["size"]
+            totals[1] += 1
+        except KeyError:
+            self.link_bytes[link] = [value["size"], 1]
+        if value["buffer"] > self.buffer_peak:
+            self.buffer_peak = value["buffer"]
+
+    def response_time(self, message, q=None):
+        """
+        Returns:
+            the mean response time of a message, or its *q* quantile
+        """
+        if q is None:
+            return self.message_response[message].mean
+        return self.message_quantiles[message].quantile(q)
+
+    def bytes_transmitted(self):
+        return sum(totals[0] for totals in self.link_bytes.values())
+
+    def summary(self, quantiles=(0.5, 0.95, 0.99)):
+        """
+        Returns:
+            a dict with the summaries of messages, DES processes and links
+        """
+        messages = {}
+        for message, stat in self.message_response.items():
+            messages[message] = stat.to_dict()
+            for q in quantiles:
+                messages[message]["q%g" % (q * 100)] = self.message_quantiles[message].quantile(q)
+        return {"messages": messages,
+                "DES": {des: stat.to_dict() for des, stat in self.des_service.items()},
+                "links": {link: {"bytes": totals[0], "messages": totals[1]}
+                          for link, totals in self.link_bytes.items()},
+                "buffer_peak": self.buffer_peak,
+                "events": self.events,
+                "link_events": self.link_events}
+
+
+class MSER5(object):
+    """
+    An online steady-state detector with the MSER-5 rule. The observations of a series are grouped in batches of
+    *batch* values and the truncation point *d* of the batch means that minimises the marginal standard error
+
+        MSER(d) = sum_{i >= d} (Z_i - mean(Z_d..Z_n))^2 / (n - d)^2
+
+    is evaluated periodically. The detector fires when that point is in the first half of the series, i.e. the
+    transient has been left behind (see :meth:`yafs.core.Sim.run` *warmup*).
+
+    Args:
+        message (str): the series is the response time (*time_out - time_emit*) of the events of this message
+
+    Kwargs:
+        batch (int): values of each batch
+
+        min_batches (int): batches observed before the first evaluation
+
+        check_every (int): new batches between two evaluations
+    """
+
+    def __init__(self, message, batch=5, min_batches=100, check_every=10):
+        self.message = message
+        self.batch = batch
+        self.min_batches = min_batches
+        self.check_every = check_every
+        self.means = []
+        self.__sum = 0.0
+        self.__count = 0
+        self.truncation = None
+        "Number of observations of the transient, when it fires"
+        self.time = None
+        "Simulation time when it fires"
+
+    def insert(self, value):
+        """
+        Args:
+            value (dict): an event of :class:`yafs.metrics.Metrics`
+
+        Returns:
+            True if the steady state is detected with this event
+        """
+        if value["message"] != self.message:
+            return False
+        self.__sum += value["time_out"] - value["time_emit"]
+        self.__count += 1
+        if self.__count < self.batch:
+            return False
+        self.means.append(self.__sum / self.batch)
+        self.__sum = 0.0
+        self.__count = 0
+        n = len(self.means)
+        if n < self.min_batches or (n - self.min_batches) % self.check_every:
+            return False
+
+        d = self.truncation_point()
+        if d <= n // 2:
+            self.truncation = d * self.batch
+            self.time = value["time_in"]
+            return True
+        return False
+
+    def truncation_point(self):
+        """
+        Returns:
+            the number of batches that minimises the MSER statistic (at least two batches are kept)
+        """
+        n = len(self.means)
+        best, best_d = math.inf, 0
+        total = total_squares = 0.0
+        # the suffix sums give the statistic of each truncation in one pass
+        for d in range(n - 1, -1, -1):
+            z = self.means[d]
+            total += z
+            total_squares += z * z
+            m = n - d
+            mser = (total_squares - total * total / m) / (m * m)
+            if m >= 2 and mser <= best:
+                best, best_d = mser, d
+        return best_d
+
+
+def _t_two_sided(theta, df):
+    """
+    P(|T| < sqrt(df) * tan(theta)) of the Student's t distribution with an integer df (closed form, Abramowitz and
+    Stegun 26.7.3 and 26.7.4)
+    """
+    c2 = math.cos(theta) ** 2
+    if df % 2:
+        if df == 1:
+            return 2 * theta / math.pi
+        term = total = 1.0
+        for j in range(1, (df - 1) // 2):
+            term *= 2 * j / (2 * j + 1) * c2
+            total += term
+        return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    term = total = 1.0
+    for j in range(1, df // 2):
+        term *= (2 * j - 1) / (2 * j) * c2
+        total += term
+    return math.sin(theta) * total
+
+
+def t_quantile(p, df):
+    """
+    Quantile of the Student's t distribution. Up to 30 degrees of freedom it inverts the exact distribution
+    function; with more, the Cornish-Fisher expansion of the normal quantile is used (its error is lower than 0.01%)
+
+    Args:
+        p (float): probability
+
+        df (int): degrees of freedom
+    """
+    if p < 0.5:
+        return -t_quantile(1 - p, df)
+    if df <= 30:
+        target = 2 * p - 1
+        low, high = 0.0, math.pi / 2
+        for _ in range(100):
+            theta = (low + high) / 2
+            if _t_two_sided(theta, df) < target:
+                low = theta
+            else:
+                high = theta
+        return math.sqrt(df) * math.tan((low + high) / 2)
+    z = NormalDist().inv_cdf(p)
+    z3, z5, z7 = z ** 3, z ** 5, z ** 7
+    return (z + (z3 + z) / (4 * df) + (5 * z5 + 16 * z3 + 3 * z) / (96 * df ** 2)
+            + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df ** 3))
+
+
+class BatchMeans(object):
+    """
+    Confidence intervals of the mean response time with the method of batch means: the simulation is divided in
+    batches (see :meth:`yafs.core.Sim.run_sequential`) and the mean of each batch is an observation of a series of
+    approximately independent values. The batches have to be long compared with the response times.
+
+    Kwargs:
+        by (str): "app", "message" or "module", an interval for each value of this column of the events
+
+        groups (list): only these values. By default: all the values observed
+
+        response (str): LOOP - the end-to-end response time of the requests, from the emission at the pure source
+        to the reception at a sink module (*time_out - time_origin* of the sink events). HOP - the response time of
+        each module (*time_out - time_emit* of all the events)
+    """
+
+    LOOP = "loop"
+    HOP = "hop"
+
+    SINK_TYPE = "SINK_M"
+    "Type of the events of the sink modules (Sim.SINK_METRIC)"
+
+    def __init__(self, by="app", groups=None, response=LOOP):
+        if response not in (self.LOOP, self.HOP):
+            raise ValueError("Unknown response: %s" % response)
+        self.by = by
+        self.groups = None if groups is None else frozenset(groups)
+        self.response = response
+        self.batches = {}
+        # group -> list of batch means
+        self.__totals = {}
+        # group -> [sum, count] of the current batch
+
+    def insert(self, value):
+        if self.response == self.LOOP:
+            if value["type"] != self.SINK_TYPE:
+                return
+            response = value["time_out"] - value["time_origin"]
+        else:
+            response = value["time_out"] - value["time_emit"]
+        group = value[self.by]
+        if self.groups is not None and group not in self.groups:
+            return
+        try:
+            totals = self.__totals[group]
+            totals[0] += response
+            totals[1] += 1
+        except KeyError:
+            self.__totals[group] = [response, 1]
+
+    def close_batch(self):
+        """
+        It ends the current batch, a group without events in the batch has no observation
+        """
+        for group, (total, count) in self.__totals.items():
+            if group not in self.batches:
+                self.batches[group] = []
+            self.batches[group].append(total / count)
+        self.__totals = {}
+
+    def discard_batch(self):
+        """
+        It drops the observations of the current batch, i.e. an incomplete batch at the end of the warm-up
+        """
+        self.__totals = {}
+
+    def interval(self, group, confidence=0.95):
+        """
+        Returns:
+            the mean and the half width of its confidence interval (nan with less than two batches)
+        """
+        means = self.batches.get(group, [])
+        k = len(means)
+        if k < 2:
+            return (means[0] if means else math.nan), math.nan
+        stat = RunningStat()
+        for mean in means:
+            stat.add(mean)
+        return stat.mean, t_quantile((1 + confidence) / 2, k - 1) * stat.std() / math.sqrt(k)
+
+    def estimates(self, confidence=0.95):
+        """
+        Returns:
+            a dict group -> dict with the mean, the half width, the relative width (half width / mean) and the
+            number of batches
+        """
+        estimates = {}
+        for group in sorted(self.batches, key=str):
+            mean, half_width = self.interval(group, confidence)
+            estimates[group] = {"mean": mean, "half_width": half_width,
+                                "relative_width": half_width / abs(mean) if mean else math.nan,
+                                "batches": len(self.batches[group])}
+        return estimates
+
+    def converged(self, relative_width, confidence=0.95, min_batches=10):
+        """
+        Returns:
+            True if each group (all the *groups*, if they are given) has *min_batches* and a relative width lower
+            than *relative_width*
+        """
+        groups = self.groups if self.groups is not None else self.batches
+        if not groups:
+            return False
+        for group in groups:
+            if len(self.batches.get(group, [])) < min_batches:
+                return False
+            mean, half_width = self.interval(group, confidence)
+            if mean == 0:
+                if half_width != 0:
+                    return False
+            elif not half_width / abs(mean) <= relative_width:
+                return False
+        return True
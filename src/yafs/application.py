@@ -35,6 +35,8 @@ class Message:
         self.bytes = bytes
 
         self.timestamp = 0
+        self.timestamp_origin = 0
+        # emission time of the request at its pure source, it is kept by the messages of the next modules
         self.path = []
         self.dst_int = -1
         self.app_name = None
@@ -55,8 +57,14 @@ class Message:
         return ("")
 
 
-def fractional_selectivity(threshold):
-    return np.random.random() <= threshold
+def fractional_selectivity(threshold, rng=None):
+    """
+    Kwargs:
+        rng (np.random.Generator): its own random stream. By default: the global np.random
+    """
+    if rng is None:
+        return np.random.random() <= threshold
+    return rng.random() <= threshold
 
 
 class Application:
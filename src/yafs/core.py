@@ -13,6 +13,11 @@ import simpy
 import math
 import warnings
 import random
+import heapq
+import itertools
+import pickle
+
+import numpy as np
 
 from yafs.topology import Topology
 from yafs.application import Application
@@ -41,6 +46,28 @@ class Sim:
 
        logger (logger) - logger
 
+       metrics (object): a configured :class:`yafs.metrics.Metrics` (i.e. with an online aggregator or without raw
+       traces). By default, the events are written in *default_results_path*
+
+       slot_contention (boolean): True - the modules deployed in a node contend for its slots (*Topology.NODE_SLOT*), a
+       processing waits until a slot is free and runs at the node IPT. False - the static allocation given by
+       :meth:`allocate_resources` is used. The slots have to be positive integers (ValueError otherwise, see
+       :meth:`yafs.topology.Topology.get_slots`)
+
+       trace_format (str): *Metrics.FORMAT_CSV* or *Metrics.FORMAT_BINARY* (dictionary-encoded records readable
+       with :func:`yafs.metrics.open_binary_trace` and :class:`yafs.stats.Stats`)
+
+       lazy_consumers (boolean): True - the pipe and the process of a consumer module are created when it receives
+       its first message (as with :meth:`deploy_modules`)
+
+       idle_timeout (float): a consumer module without messages during this time releases its pipe and its process,
+       they are created again with the next message. The messages waiting to complete a set are kept
+
+       checkpointing (boolean): True - the DES processes keep the state that :meth:`run` saves with its *checkpoint*
+       argument. It has a cost on each event, so it is disabled by default
+
+    A simulation can be saved at the end of :meth:`run` (*checkpoint* argument, with *checkpointing=True*) and
+    continued, or forked in several what-if runs, with :meth:`restore`.
 
     **Main variables to coordinate with algorithm:**
 
@@ -52,8 +79,17 @@ class Sim:
     SINK_METRIC = "SINK_M"
     LINK_METRIC = "LINK"
 
+    CHECKPOINT_ATTRIBUTES = ["topology", "apps", "placement_policy", "population_policy", "selector_path",
+                             "des_process_running", "des_control_process", "alloc_source", "alloc_module", "alloc_DES",
+                             "pending_consumers", "pipe_queues", "module_alloc_percentage", "server_overhead_factor",
+                             "last_busy_time", "entity_metrics", "unreachabled_links", "energy_model",
+                             "slot_contention", "lazy_consumers", "idle_timeout"]
+    "Variables of the simulation saved in a checkpoint, besides the state of the DES processes and the pipes"
+
     def __init__(self, topology, name_register='events_log.json', link_register='links_log.json', redis=None,
-                 purge_register=True, logger=None, default_results_path=None):
+                 purge_register=True, logger=None, default_results_path=None, slot_contention=False,
+                 metrics=None, trace_format=Metrics.FORMAT_CSV, lazy_consumers=False, idle_timeout=None,
+                 checkpointing=False):
 
         self.env = simpy.Environment()
         """
@@ -81,7 +117,9 @@ class Sim:
 
         self.until = 0  # End time simulation
 
-        self.metrics = Metrics(default_results_path=default_results_path)
+        self.metrics = metrics
+        if metrics is None:
+            self.metrics = Metrics(default_results_path=default_results_path, trace_format=trace_format)
 
         self.unreachabled_links = 0
 
@@ -129,6 +167,12 @@ class Sim:
         self.consumer_pipes = {}
         # Queues for each message
         # App+module+idDES -> pipe
+        self.pending_consumers = {}
+        # App+module+idDES -> arguments of the consumer process, its pipe and process are created with the first message
+        self.__pending_pipes = {}
+        # idDES -> App+module+idDES of the pending consumers
+        self.lazy_consumers = lazy_consumers
+        self.idle_timeout = idle_timeout
         self.pipe_queues = {}  # one-to-one mapped to consumer_pipes
         # App+module+idDES -> queued msg list
         # get queued msg sets
@@ -137,6 +181,14 @@ class Sim:
         # key: module name, value: percentage of server CPU allocated
         self.server_overhead_factor = {}
 
+        self.slot_contention = slot_contention
+        if slot_contention:
+            # the slots are checked before the simulation
+            for id_node in topology.get_info():
+                topology.get_slots(id_node)
+        self.server_slots = {}
+        # topology.node.id -> simpy.Resource, its capacity is the number of slots of the node. Created on first use
+
         self.alloc_module = {}
         """
         Represents the deployment of a module in a DES PROCESS each DES has a one topology.node.id (see alloc_des var.)
@@ -168,6 +220,23 @@ class Sim:
         # This variable control the lag of each busy network links. It avoids the generation of a DES-process for each link
         # edge -> last_use_channel (float) = Simulation time
 
+        self.energy_model = None
+        """
+        An optional energy accounting notified at the start and end of each processing (see :meth:`deploy_energy_model`)
+        """
+
+        self.__checkpointing = checkpointing
+        self.__processes = {}
+        # key -> [kind, arguments] of the DES processes that a checkpoint restarts
+        self.__wakeups = {}
+        # key -> (time, order) of the pending timeout of those processes
+        self.__in_service = {}
+        # key -> (msg_tuple, last msg, order) of the consumer modules that are processing a tuple or waiting for a slot
+        self.__keys = itertools.count()
+        self.__order = itertools.count()
+        self.__restored = None
+        # the DES processes of a restored checkpoint, they are started by run
+
     def __pipe_preprocess(self, app_name, module_name, idDES):
         pipe_id = "%s-%s-%i" % (app_name, module_name, idDES)
         # filter messages into sets in a FIFO order, and add to the pipe_queue
@@ -230,9 +299,6 @@ class Sim:
         Performs the simulation of packages within the path between src and dst entities decided by the selection algorithm.
         In this way, the message has a transmission latency.
         """
-        edges = self.topology.get_edges().keys()
-        self.last_busy_time = {}  # dict(zip(edges, [0.0] * len(edges)))
-
         while not self.stop:
             message = yield self.network_ctrl_pipe.get()
 
@@ -245,13 +311,7 @@ class Sim:
 
             # If same SRC and PATH or the message has achieved the penultimate node to reach the dst
             if not message.path or message.path[-1] == message.dst_int or len(message.path) == 1:
-
-                pipe_id = "%s-%s-%i" % (
-                    message.app_name, message.dst, message.idDES)  # app_name + module_name (dst) + idDES
-                # Timestamp reception message in the module
-                message.timestamp_rec = self.env.now
-                # The message is sent to the module.pipe
-                self.consumer_pipes[pipe_id].put(message)
+                self.__deliver(message)
             else:
                 # The message is sent at first time or it sent more times.
                 # if message.dst_int < 0:
@@ -289,13 +349,6 @@ class Sim:
 
                     # print "-link: %s -- lat: %d" %(link,latency_msg_link)
 
-                    # update link metrics
-                    self.metrics.insert_link(
-                        {"id": message.id, "type": self.LINK_METRIC, "src": link[0], "dst": link[1],
-                         "app": message.app_name, "latency": latency_msg_link, "message": message.name,
-                         "ctime": self.env.now, "size": message.bytes,
-                         "buffer": self.network_pump})  # "path":message.path})
-
                     # We compute the future latency considering the current utilization of the link
                     if last_used < self.env.now:
                         shift_time = 0.0
@@ -304,6 +357,15 @@ class Sim:
                         shift_time = last_used - self.env.now
                         last_used = self.env.now + shift_time + latency_msg_link
 
+                    # update link metrics, shift is the waiting time in the link queue
+                    policy = self.metrics.policy
+                    if policy is None or policy.accept(message.id, message.app_name, message.dst, message.name):
+                        self.metrics.insert_link(
+                            {"id": message.id, "type": self.LINK_METRIC, "src": link[0], "dst": link[1],
+                             "app": message.app_name, "latency": latency_msg_link, "message": message.name,
+                             "ctime": self.env.now, "size": message.bytes,
+                             "buffer": self.network_pump, "shift": shift_time})  # "path":message.path})
+
                     # print "Send next WakeUp : ", last_used
                     # print "-" * 30
 
@@ -341,15 +403,64 @@ class Sim:
                         # print "\t",msg.path
                         self.network_ctrl_pipe.put(message)
 
+    def __deliver(self, message):
+        """
+        The message is sent to the pipe of its destination module
+        """
+        pipe_id = "%s-%s-%i" % (message.app_name, message.dst, message.idDES)  # app_name + module_name (dst) + idDES
+        # Timestamp reception message in the module
+        message.timestamp_rec = self.env.now
+        if pipe_id in self.pending_consumers:
+            # the pipe and the process of a lazy (or idle) module start with its first message
+            consumer = self.pending_consumers.pop(pipe_id)
+            del self.__pending_pipes[consumer[0]]
+            self.consumer_pipes[pipe_id] = simpy.Store(self.env)
+            self.env.process(self.__add_consumer_module(*consumer))
+        self.consumer_pipes[pipe_id].put(message)
+
     def __wait_message(self, msg, latency, shift_time):
         """
         Simulates the transfer behavior of a message on a link
         """
+        key = self.__track("transit", msg)
         self.network_pump += 1
-        yield self.env.timeout(latency + shift_time)
+        yield self.__sleep(key, latency + shift_time)
         self.network_pump -= 1
+        self.__untrack(key)
         self.network_ctrl_pipe.put(msg)
 
+    def __set_pending(self, pipe_id, consumer):
+        """
+        The pipe and the process of the consumer (the arguments of its process) are created with its next message
+        """
+        self.pending_consumers[pipe_id] = consumer
+        self.__pending_pipes[consumer[0]] = pipe_id
+
+    def __track(self, kind, *args):
+        """
+        It registers a DES process that is restarted from a checkpoint with these arguments
+        """
+        if not self.__checkpointing:
+            return None
+        key = next(self.__keys)
+        self.__processes[key] = [kind, args]
+        return key
+
+    def __untrack(self, key):
+        if not self.__checkpointing:
+            return
+        self.__processes.pop(key, None)
+        self.__wakeups.pop(key, None)
+
+    def __sleep(self, key, delay):
+        """
+        A timeout of a tracked DES process, its time is saved in the checkpoints
+        """
+        if not self.__checkpointing:
+            return self.env.timeout(delay)
+        self.__wakeups[key] = (self.env.now + delay, next(self.__order))
+        return self.env.timeout(delay)
+
     def __get_id_process(self):
         """
         A DES-process has an unique identifier
@@ -357,6 +468,14 @@ class Sim:
         self.__idProcess += 1
         return self.__idProcess
 
+    def __get_id_range(self, n):
+        """
+        Unique identifiers for *n* DES-processes
+        """
+        ids = range(self.__idProcess + 1, self.__idProcess + 1 + n)
+        self.__idProcess += n
+        return ids
+
     def __init_metrics(self):
         """
         Each entity and node metrics are initialized with empty values
@@ -371,51 +490,69 @@ class Sim:
                                       Topology.LINK_BW: self.topology.get_edge(edge)[self.topology.LINK_BW]}
         return measures
 
-    def __add_placement_process(self, placement):
+    def __add_placement_process(self, placement, myId=None, resume_at=None):
         """
         A DES-process who controls the invocation of Placement.run
         """
-        myId = self.__get_id_process()
-        self.des_process_running[myId] = True
-        self.des_control_process[placement.name] = myId
+        if myId is None:
+            myId = self.__get_id_process()
+            self.des_process_running[myId] = True
+            self.des_control_process[placement.name] = myId
+        key = self.__track("placement", placement, myId)
 
         self.logger.debug("Added_Process - Placement Algorithm\t#DES:%i" % myId)
         while not self.stop and self.des_process_running[myId]:
-            yield self.env.timeout(placement.get_next_activation())
+            if resume_at is None:
+                next_activation = placement.get_next_activation()
+            else:
+                next_activation, resume_at = resume_at - self.env.now, None
+            yield self.__sleep(key, next_activation)
             placement.run(self)
             self.logger.debug("(DES:%i) %7.4f Run - Placement Policy: %s " % (myId, self.env.now, self.stop))  # Rewrite
+        self.__untrack(key)
         self.logger.debug("STOP_Process - Placement Algorithm\t#DES:%i" % myId)
 
-    def __add_population_process(self, population):
+    def __add_population_process(self, population, myId=None, resume_at=None):
         """
         A DES-process who controls the invocation of Population.run
         """
-        myId = self.__get_id_process()
-        self.des_process_running[myId] = True
-        self.des_control_process[population.name] = myId
+        if myId is None:
+            myId = self.__get_id_process()
+            self.des_process_running[myId] = True
+            self.des_control_process[population.name] = myId
+        key = self.__track("population", population, myId)
 
         self.logger.debug("Added_Process - Population Algorithm\t#DES:%i" % myId)
         while not self.stop and self.des_process_running[myId]:
-            yield self.env.timeout(population.get_next_activation())
+            if resume_at is None:
+                next_activation = population.get_next_activation()
+            else:
+                next_activation, resume_at = resume_at - self.env.now, None
+            yield self.__sleep(key, next_activation)
             self.logger.debug(
                 "(DES:%i) %7.4f Run - Population Policy: %s " % (myId, self.env.now, self.stop))  # REWRITE
             population.run(self)
+        self.__untrack(key)
         self.logger.debug("STOP_Process - Population Algorithm\t#DES:%i" % myId)
 
     def __getIDMessage(self):
         self.__idMessage += 1
         return self.__idMessage
 
-    def __add_source_population(self, idDES, name_app, msg_out_list, distribution):
+    def __add_source_population(self, idDES, name_app, msg_out_list, distribution, resume_at=None):
         """
         A DES-process who controls the invocation of several Pure Source Modules
         """
+        key = self.__track("source", idDES, name_app, msg_out_list, distribution)
         self.logger.debug("Added_Process - Module Pure Source\t#DES:%i" % idDES)
         msg_out_name_list = [msg_out.name for msg_out in msg_out_list]
         msg_out_names_str = ''.join(msg_out_name_list)
         while not self.stop and self.des_process_running[idDES]:
-            nextTime = distribution.next()
-            yield self.env.timeout(nextTime)
+            if resume_at is None:
+                nextTime = distribution.next()
+            else:
+                nextTime, resume_at = resume_at - self.env.now, None
+            yield self.__sleep(key, nextTime)
             if self.des_process_running[idDES]:
                 self.logger.debug("(App:%s#DES:%i)\tModule - Generating Message: %s \t(T:%d)" % (
                     name_app, idDES, msg_out_names_str, self.env.now))
@@ -423,12 +560,61 @@ class Sim:
                 for msg_out in msg_out_list:
                     msg = copy.copy(msg_out)
                     msg.timestamp = self.env.now
+                    msg.timestamp_origin = self.env.now
                     msg.id = self.__getIDMessage()
                     msg.original_DES_src = idDES
                     self.__send_message(name_app, msg, idDES, self.SOURCE_METRIC)
 
+        self.__untrack(key)
         self.logger.debug("STOP_Process - Module Pure Source\t#DES:%i" % idDES)
 
+    def __add_source_group(self, ides_list, name_app, msg_out_list, distributions, heap=None):
+        """
+        A DES-process who drives a group of Pure Source Modules with a heap of their next emission times.
+        Each message is sent as if it came from its own source (*original_DES_src*)
+        """
+        self.logger.debug("Added_Process - Source group of %i sources\t#DES:%i-%i" % (
+            len(ides_list), ides_list[0], ides_list[-1]))
+        if heap is None:
+            heap = []
+            for k, idDES in enumerate(ides_list):
+                next_time = distributions[k].next()
+                if next_time != math.inf:
+                    heap.append((self.env.now + next_time, k))
+            heapq.heapify(heap)
+        # the heap is updated in place, so a checkpoint saves the next emission of each source
+        key = self.__track("source_group", ides_list, name_app, msg_out_list, distributions, heap)
+
+        while not self.stop and heap:
+            due = heap[0][0]
+            yield self.__sleep(key, due - self.env.now)
+            # all the sources due at this time emit in a row (in the order of the group), as their own processes
+            # would do, so the messages get the same ids
+            while heap and heap[0][0] <= due:
+                next_time, k = heap[0]
+                idDES = ides_list[k]
+                if not self.des_process_running[idDES]:
+                    # a stopped source leaves the group
+                    heapq.heappop(heap)
+                    continue
+
+                for msg_out in msg_out_list:
+                    msg = copy.copy(msg_out)
+                    msg.timestamp = self.env.now
+                    msg.timestamp_origin = self.env.now
+                    msg.id = self.__getIDMessage()
+                    msg.original_DES_src = idDES
+                    self.__send_message(name_app, msg, idDES, self.SOURCE_METRIC)
+
+                next_time = distributions[k].next()
+                if next_time == math.inf:
+                    heapq.heappop(heap)
+                else:
+                    heapq.heapreplace(heap, (self.env.now + next_time, k))
+
+        self.__untrack(key)
+        self.logger.debug("STOP_Process - Source group\t#DES:%i-%i" % (ides_list[0], ides_list[-1]))
+
     def __update_node_metrics(self, app, module, msg_tuple, des, type):
         try:
             """
@@ -456,10 +642,14 @@ class Sim:
                 for msg_to_process in msg_tuple:
                     inst_sum += msg_to_process.inst
 
-                alloc_percentage = self.module_alloc_percentage[app][module]
-                # time_service = inst_sum / float(att_node["IPT"])
-                overhead_factor = self.server_overhead_factor[id_node]
-                time_service = inst_sum * overhead_factor / (float(att_node["IPT"]) * alloc_percentage)
+                if self.slot_contention:
+                    # the module holds a whole slot
+                    time_service = inst_sum / total_ipt
+                else:
+                    alloc_percentage = self.module_alloc_percentage[app][module]
+                    # time_service = inst_sum / float(att_node["IPT"])
+                    overhead_factor = self.server_overhead_factor[id_node]
+                    time_service = inst_sum * overhead_factor / (float(att_node["IPT"]) * alloc_percentage)
 
                 # divide by the allocated resources for the current module
                 #  multiply by the multi-tenancy overhead (if any)
@@ -511,7 +701,10 @@ class Sim:
 
             # print "Source DES ",sourceDES
             # print "-" * 50
+            policy = self.metrics.policy
             for msg_processed in msg_tuple:
+                if policy is not None and not policy.accept(msg_processed.id, app, module, msg_processed.name):
+                    continue
                 try:
                     sourceDES = self.alloc_module[app][msg_processed.src]
                 except:
@@ -523,7 +716,9 @@ class Sim:
 
                      "service": time_service, "time_in": self.env.now,
                      "time_out": time_service + self.env.now, "time_emit": float(msg_processed.timestamp),
-                     "time_reception": float(msg_processed.timestamp_rec)
+                     "time_reception": float(msg_processed.timestamp_rec),
+                     # not written in the traces, it is used by the online estimators
+                     "time_origin": float(msg_processed.timestamp_origin)
 
                      })
 
@@ -566,15 +761,20 @@ class Sim:
 
         self.logger.debug("STOP_Process - Down entity Creation\t#DES%i" % myId)
 
-    def __add_source_module(self, idDES, app_name, module, msg_out_list, distribution, **param):
+    def __add_source_module(self, idDES, app_name, module, msg_out_list, distribution, resume_at=None, **param):
         """
         It generates a DES process associated to a compute module for the generation of messages
         """
+        key = self.__track("source_module", idDES, app_name, module, msg_out_list, distribution)
         self.logger.debug("Added_Process - Module Source: %s\t#DES:%i" % (module, idDES))
         msg_out_name_list = [msg_out.name for msg_out in msg_out_list]
         msg_out_names_str = ''.join(msg_out_name_list)
         while (not self.stop) and self.des_process_running[idDES]:
-            yield self.env.timeout(distribution.next())
+            if resume_at is None:
+                next_time = distribution.next()
+            else:
+                next_time, resume_at = resume_at - self.env.now, None
+            yield self.__sleep(key, next_time)
             if self.des_process_running[idDES]:
                 self.logger.debug(
                     "(App:%s#DES:%i#%s)\tModule - Generating Messages:\t%s" % (
@@ -583,10 +783,12 @@ class Sim:
                 for msg_out in msg_out_list:
                     msg = copy.copy(msg_out)
                     msg.timestamp = self.env.now
+                    msg.timestamp_origin = self.env.now
                     msg.original_DES_src = idDES
 
                     self.__send_message(app_name, msg, idDES, self.SOURCE_METRIC)
 
+        self.__untrack(key)
         self.logger.debug("STOP_Process - Module Source: %s\t#DES:%i" % (module, idDES))
 
     def __add_msg_to_pipe_queue(self, app_name, module_name, idDES, msg):
@@ -609,10 +811,11 @@ class Sim:
                 msg_tuple.append(msg_list.pop(0))
         return tuple_ready, msg_tuple
 
-    def __add_consumer_module(self, ides, app_name, module, register_consumer_msg):
+    def __add_consumer_module(self, ides, app_name, module, register_consumer_msg, in_service=None):
         """
         It generates a DES process associated to a compute module
         """
+        key = self.__track("consumer", ides, app_name, module, register_consumer_msg)
         self.logger.debug("Added_Process - Module Consumer: %s\t#DES:%i" % (module, ides))
         # init pipe queues for this module
         # get input message types of the module
@@ -627,9 +830,25 @@ class Sim:
             if msg.name not in current_queue:
                 current_queue[msg.name] = []
 
+        if in_service is not None:
+            # a processing saved in a checkpoint
+            yield from self.__resume_tuple(key, ides, app_name, module, register_consumer_msg, *in_service)
+
+        timer = None
         while not self.stop and self.des_process_running[ides]:
             if self.des_process_running[ides]:
-                msg = yield self.consumer_pipes["%s-%s-%i" % (app_name, module, ides)].get()
+                if self.idle_timeout is None:
+                    msg = yield self.consumer_pipes[pipe_id].get()
+                else:
+                    msg, timer = yield from self.__idle_get(pipe_id, timer)
+                    if msg is None:
+                        # idle: the module is activated again by its next message
+                        if self.des_process_running[ides]:
+                            del self.consumer_pipes[pipe_id]
+                            self.__set_pending(pipe_id, (ides, app_name, module, register_consumer_msg))
+                        self.__untrack(key)
+                        self.logger.debug("IDLE_Process - Module Consumer: %s\t#DES:%i" % (module, ides))
+                        return
                 print(f'{module} got msg from consumer pipe: {msg.name}, to {msg.dst}')
                 # check if the new msg completes a set of msgs to be processed
                 self.__add_msg_to_pipe_queue(app_name, module, ides, msg)
@@ -637,56 +856,140 @@ class Sim:
                 tuple_ready, msg_tuple = self.__check_msg_queue(app_name, module, ides)
                 if tuple_ready:
                     print("tuple ready")
-                    for msg_to_process in msg_tuple:
-                        self.logger.debug(
-                            "(App:%s#DES:%i#%s)\tModule - Processing Message:\t%s" % (
-                                app_name, ides, module,
-                                msg_to_process.name))
-                    service_time = self.__update_node_metrics(app_name, module, msg_tuple, ides, self.NODE_METRIC)
-                    print("processing triggered at: ", self.env.now)
-                    print("processing time: ", service_time)
-                    # process the tuple of messages
-                    yield self.env.timeout(service_time)
-                    # check the message_out_list, generate and send msgs out to the next modules
-                    msg_in_name_list = [msg.name for msg in msg_tuple]
-                    for register_io in register_consumer_msg:
-                        r_msg_in_name_list = [r_msg.name for r_msg in register_io["message_in_list"]]
-                        if set(msg_in_name_list) == set(r_msg_in_name_list):
-                            if not register_io["message_out_list"]:
-                                # The current module is a sink, no need to perform any output
-                                name_string = ''.join(msg_in_name_list)
-                                self.logger.debug(
-                                    "(App:%s#DES:%i#%s)\tModule - Sink Message:\t%s" % (
-                                        app_name, ides, module,
-                                        name_string))
-                                continue
-                            else:
-                                msg_out_list = register_io["message_out_list"]
-                                msg_out_name_list = [msg.name for msg in msg_out_list]
-                                if register_io["dist"](**register_io["param"]):
-                                    # msg_out_list = register_io["message_out_list"]
-                                    # msg_out_name_list = [msg.name for msg in msg_out_list]
-                                    name_string = ''.join(msg_out_name_list)
-                                    self.logger.debug("(App:%s#DES:%i#%s)\tModule - Transmit Message:\t%s" % (
-                                        app_name, ides, module, name_string))
-
-                                    for t_msg_out in msg_out_list:
-                                        msg_out = copy.copy(t_msg_out)
-                                        msg_out.timestamp = self.env.now
-                                        msg_out.id = msg.id
-                                        msg_out.last_idDes = copy.copy(msg.last_idDes)
-                                        msg_out.last_idDes.append(ides)
-                                        self.__send_message(app_name, msg_out, ides, self.FORWARD_METRIC)
-                                else:
-                                    self.logger.debug("(App:%s#DES:%i#%s)\tModule - Stopped Message:\t%s" % (
-                                        app_name, ides, module, name_string))
+                    yield from self.__process_tuple(key, ides, app_name, module, register_consumer_msg, msg_tuple, msg)
 
+        self.__untrack(key)
         self.logger.debug("STOP_Process - Module Consumer: %s\t#DES:%i" % (module, ides))
 
+    def __idle_get(self, pipe_id, timer):
+        """
+        It waits for the next message of a consumer module until its idle timeout. The *timer* of a previous wait
+        is armed again for the remaining time, so a module has one timer instead of one for each message
+
+        Returns:
+            the message (None - the module is idle) and the timer
+        """
+        pipe = self.consumer_pipes[pipe_id]
+        get = pipe.get()
+        idle_time = self.env.now + self.idle_timeout
+        while True:
+            if timer is None:
+                timer = self.env.timeout(idle_time - self.env.now)
+            yield get | timer
+            if timer.processed:
+                timer = None
+            if get.triggered:
+                return get.value, timer
+            if self.env.now >= idle_time:
+                break
+        get.cancel()
+        # a message delivered at the same time as the timeout is still in the pipe
+        return (pipe.items.pop(0) if pipe.items else None), timer
+
+    def __process_tuple(self, key, ides, app_name, module, register_consumer_msg, msg_tuple, msg):
+        """
+        The processing of a tuple of messages by a consumer module and the transmission of its output messages
+        """
+        id_node = self.alloc_DES.get(ides)
+        if self.__checkpointing:
+            self.__in_service[key] = (msg_tuple, msg, next(self.__order))
+        for msg_to_process in msg_tuple:
+            self.logger.debug(
+                "(App:%s#DES:%i#%s)\tModule - Processing Message:\t%s" % (
+                    app_name, ides, module,
+                    msg_to_process.name))
+        slot_request = None
+        if self.slot_contention and id_node is not None:
+            # queueing delay until a slot of the node is free
+            slot_request = self.__get_server_slots(id_node).request()
+            yield slot_request
+        service_time = self.__update_node_metrics(app_name, module, msg_tuple, ides, self.NODE_METRIC)
+        print("processing triggered at: ", self.env.now)
+        print("processing time: ", service_time)
+        if self.energy_model is not None:
+            self.energy_model.processing_start(id_node, self.env.now)
+        # process the tuple of messages
+        yield self.__sleep(key, service_time)
+        self.__end_processing(key, id_node, slot_request)
+        self.__transmit_outputs(ides, app_name, module, register_consumer_msg, msg_tuple, msg)
+
+    def __resume_tuple(self, key, ides, app_name, module, register_consumer_msg, msg_tuple, msg, end_time,
+                       slot_request):
+        """
+        A processing saved in a checkpoint: it waits until its *end_time*, or it starts again if it was waiting for
+        a slot (*end_time* is None)
+        """
+        if end_time is None:
+            yield from self.__process_tuple(key, ides, app_name, module, register_consumer_msg, msg_tuple, msg)
+            return
+        self.__in_service[key] = (msg_tuple, msg, next(self.__order))
+        yield self.__sleep(key, end_time - self.env.now)
+        self.__end_processing(key, self.alloc_DES.get(ides), slot_request)
+        self.__transmit_outputs(ides, app_name, module, register_consumer_msg, msg_tuple, msg)
+
+    def __end_processing(self, key, id_node, slot_request):
+        if self.__checkpointing:
+            del self.__in_service[key]
+            del self.__wakeups[key]
+        if self.energy_model is not None:
+            self.energy_model.processing_stop(id_node, self.env.now)
+        if slot_request is not None:
+            self.server_slots[id_node].release(slot_request)
+
+    def __transmit_outputs(self, ides, app_name, module, register_consumer_msg, msg_tuple, msg):
+        """
+        It sends the output messages of the processing of *msg_tuple* (*msg* is its last message)
+        """
+        # check the message_out_list, generate and send msgs out to the next modules
+        msg_in_name_list = [msg.name for msg in msg_tuple]
+        for register_io in register_consumer_msg:
+            r_msg_in_name_list = [r_msg.name for r_msg in register_io["message_in_list"]]
+            if set(msg_in_name_list) == set(r_msg_in_name_list):
+                if not register_io["message_out_list"]:
+                    # The current module is a sink, no need to perform any output
+                    name_string = ''.join(msg_in_name_list)
+                    self.logger.debug(
+                        "(App:%s#DES:%i#%s)\tModule - Sink Message:\t%s" % (
+                            app_name, ides, module,
+                            name_string))
+                    continue
+                else:
+                    msg_out_list = register_io["message_out_list"]
+                    msg_out_name_list = [msg.name for msg in msg_out_list]
+                    if register_io["dist"](**register_io["param"]):
+                        # msg_out_list = register_io["message_out_list"]
+                        # msg_out_name_list = [msg.name for msg in msg_out_list]
+                        name_string = ''.join(msg_out_name_list)
+                        self.logger.debug("(App:%s#DES:%i#%s)\tModule - Transmit Message:\t%s" % (
+                            app_name, ides, module, name_string))
+
+                        for t_msg_out in msg_out_list:
+                            msg_out = copy.copy(t_msg_out)
+                            msg_out.timestamp = self.env.now
+                            msg_out.timestamp_origin = msg.timestamp_origin
+                            msg_out.id = msg.id
+                            msg_out.last_idDes = copy.copy(msg.last_idDes)
+                            msg_out.last_idDes.append(ides)
+                            self.__send_message(app_name, msg_out, ides, self.FORWARD_METRIC)
+                    else:
+                        self.logger.debug("(App:%s#DES:%i#%s)\tModule - Stopped Message:\t%s" % (
+                            app_name, ides, module, name_string))
+
+    def __get_server_slots(self, id_node):
+        """
+        It returns the shared resource that models the slots of a node
+        """
+        try:
+            return self.server_slots[id_node]
+        except KeyError:
+            self.server_slots[id_node] = simpy.Resource(self.env, capacity=self.topology.get_slots(id_node))
+            return self.server_slots[id_node]
+
     def __add_sink_module(self, ides, app_name, module):
         """
         It generates a DES process associated to a SINK module
         """
+        key = self.__track("sink", ides, app_name, module)
         self.logger.debug("Added_Process - Module Pure Sink: %s\t#DES:%i" % (module, ides))
         while not self.stop and self.des_process_running[ides]:
             msg = yield self.consumer_pipes["%s-%s-%i" % (app_name, module, ides)].get()
@@ -699,6 +1002,7 @@ class Sim:
             service_time = self.__update_node_metrics(app_name, module, [msg], ides, type)
             yield self.env.timeout(service_time)  # service time is 0
 
+        self.__untrack(key)
         self.logger.debug("STOP_Process - Module Pure Sink: %s\t#DES:%i" % (module, ides))
 
     def __add_stop_monitor(self, name, function, distribution, show_progress_monitor, **param):
@@ -715,14 +1019,20 @@ class Sim:
             function(show_progress_monitor, **param)
         self.logger.debug("STOP_Process - Internal Monitor: %s\t#DES:%i" % (name, myId))
 
-    def __add_monitor(self, idDES, name, function, distribution, **param):
+    def __add_monitor(self, idDES, name, function, distribution, resume_at=None, **param):
         """
         Add a DES process for user purpose
         """
+        key = self.__track("monitor", idDES, name, function, distribution, param)
         self.logger.debug("Added_Process - Internal Monitor: %s\t#DES:%i" % (name, idDES))
         while not self.stop and self.des_process_running[idDES]:
-            yield self.env.timeout(distribution.next())
+            if resume_at is None:
+                next_time = distribution.next()
+            else:
+                next_time, resume_at = resume_at - self.env.now, None
+            yield self.__sleep(key, next_time)
             function(**param)
+        self.__untrack(key)
         self.logger.debug("STOP_Process - Internal Monitor: %s\t#DES:%i" % (name, idDES))
 
     def __add_consumer_service_pipe(self, app_name, module, idDES):
@@ -749,6 +1059,127 @@ class Sim:
     DEPRECATED
     """
 
+    def __write_checkpoint(self, path):
+        """
+        It saves the state of the simulation in *path* (see :meth:`restore`)
+        """
+        state = {name: getattr(self, name) for name in self.CHECKPOINT_ATTRIBUTES}
+        state.update({
+            "now": self.env.now,
+            "id_process": self.__idProcess,
+            "id_message": self.__idMessage,
+            "network_pipe": list(self.network_ctrl_pipe.items),
+            "consumer_pipes": {pipe_id: list(pipe.items) for pipe_id, pipe in self.consumer_pipes.items()},
+            "processes": [(kind, args, self.__wakeups.get(key), self.__in_service.get(key))
+                          for key, (kind, args) in self.__processes.items()],
+            "random": random.getstate(),
+            "numpy": np.random.get_state(),
+            "metrics": self.metrics.checkpoint(),
+        })
+        with open(path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.logger.info("Checkpoint at time %f: %s" % (self.env.now, path))
+
+    def __restart_processes(self):
+        """
+        It starts the DES processes of a restored checkpoint in the order of their pending timeouts, so the events
+        of the same time keep their order
+        """
+        now = self.env.now
+        processes = []
+        for kind, args, wakeup, in_service in self.__restored:
+            if wakeup is not None:
+                order = wakeup
+            elif in_service is not None:
+                # waiting for a slot
+                order = (now, in_service[2])
+            else:
+                order = (now, -1)
+            processes.append((order, kind, args, wakeup, in_service))
+        processes.sort(key=lambda process: process[0])
+        self.__restored = None
+
+        for order, kind, args, wakeup, in_service in processes:
+            resume_at = None if wakeup is None else wakeup[0]
+            self.env.process(self.__restarted_process(kind, args, resume_at, in_service))
+
+    def __restarted_process(self, kind, args, resume_at, in_service):
+        """
+        Returns:
+            the generator of a DES process saved in a checkpoint, it continues at *resume_at*
+        """
+        if kind == "transit":
+            return self.__wait_message(args[0], resume_at - self.env.now, 0.0)
+        if kind == "consumer":
+            return self.__restart_consumer(args, resume_at, in_service)
+        if kind == "monitor":
+            idDES, name, function, distribution, param = args
+            return self.__add_monitor(idDES, name, function, distribution, resume_at=resume_at, **param)
+        if kind in ("source_group", "sink"):
+            # the group keeps its next emissions in its heap and the sinks do not wait
+            generator = self.__add_source_group if kind == "source_group" else self.__add_sink_module
+            return generator(*args)
+        generators = {"source": self.__add_source_population, "source_module": self.__add_source_module,
+                      "placement": self.__add_placement_process, "population": self.__add_population_process}
+        return generators[kind](*args, resume_at=resume_at)
+
+    def __restart_consumer(self, args, resume_at, in_service):
+        if in_service is not None:
+            msg_tuple, msg, _ = in_service
+            slot_request = None
+            id_node = self.alloc_DES.get(args[0])
+            if resume_at is not None and self.slot_contention and id_node is not None:
+                # the slot is taken again before any waiting processing asks for it
+                slot_request = self.__get_server_slots(id_node).request()
+            in_service = (msg_tuple, msg, resume_at, slot_request)
+        return self.__add_consumer_module(*args, in_service=in_service)
+
+    @classmethod
+    def restore(cls, path, logger=None, default_results_path=None):
+        """
+        It creates a simulation from a checkpoint written by :meth:`run`. Its *run(until)* continues the simulation
+        from the time of the checkpoint: the allocations, the messages in the links and in the pipes, the processings,
+        the next emission of each source, the busy time of the links, the states of *random* and *numpy.random* and
+        the distributions are the same. The policies can be changed before *run* to fork what-if runs.
+
+        The DES processes created by *register_event_entity* are not restarted.
+
+        Args:
+            path (str): the checkpoint file
+
+        Kwargs:
+            logger (logger): logger
+
+            default_results_path (str): the events are written in new traces. By default, the traces of the
+            checkpointed simulation are truncated at the checkpoint and continued
+
+        Returns:
+            a Sim
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        metrics_state = state["metrics"]
+        if default_results_path is not None:
+            metrics_state.pop("resume", None)
+            metrics_state["default_results_path"] = default_results_path
+
+        sim = cls(state["topology"], logger=logger, metrics=Metrics(**metrics_state), checkpointing=True)
+        for name in cls.CHECKPOINT_ATTRIBUTES:
+            setattr(sim, name, state[name])
+        sim.env = simpy.Environment(initial_time=state["now"])
+        sim.network_ctrl_pipe = simpy.Store(sim.env)
+        sim.network_ctrl_pipe.items.extend(state["network_pipe"])
+        for pipe_id, items in state["consumer_pipes"].items():
+            sim.consumer_pipes[pipe_id] = simpy.Store(sim.env)
+            sim.consumer_pipes[pipe_id].items.extend(items)
+        sim.__idProcess = state["id_process"]
+        sim.__idMessage = state["id_message"]
+        sim.__restored = state["processes"]
+        sim.__pending_pipes = {consumer[0]: pipe_id for pipe_id, consumer in sim.pending_consumers.items()}
+        random.setstate(state["random"])
+        np.random.set_state(state["numpy"])
+        return sim
+
     def __update_internal_structures_from_DES_remove(self, DES):
         try:
             self.alloc_DES.pop(DES, None)
@@ -785,6 +1216,35 @@ class Sim:
         self.env.process(self.__add_monitor(idDES, name, function, distribution, **param))
         return idDES
 
+    def get_busy_slots(self, id_node):
+        """
+        Returns:
+            the number of slots of the node that are processing and the number of processings waiting for a slot
+        """
+        if id_node not in self.server_slots:
+            return 0, 0
+        slots = self.server_slots[id_node]
+        return slots.count, len(slots.queue)
+
+    def deploy_energy_model(self, energy_model):
+        """
+        Links an energy accounting with the simulation. The model is only updated when a processing starts or ends.
+
+        Args:
+            energy_model (object): it implements *processing_start(id_node, time)*, *processing_stop(id_node, time)*,
+            *battery_level(id, time)* and *close(time)*, i.e. :class:`mec_simulations.mec_energy.MECEnergyModel`
+        """
+        self.energy_model = energy_model
+
+    def get_battery_level(self, id_battery):
+        """
+        It returns the current energy stored in a battery (i.e. a MDC). It can be used by placement and selection policies.
+        None if no energy model is deployed (see :meth:`deploy_energy_model`)
+        """
+        if self.energy_model is None:
+            return None
+        return self.energy_model.battery_level(id_battery, self.env.now)
+
     def register_event_entity(self, next_event_dist, event_type=EVENT_UP_ENTITY, **args):
         if event_type == EVENT_UP_ENTITY:
             self.env.process(self.__add_up_node_process(next_event_dist, **args))
@@ -820,6 +1280,45 @@ class Sim:
         self.alloc_source[idDES] = {"id": id_node, "app": app_name, "module": source_module, "names": source_msg_names}
         return idDES
 
+    def deploy_source_group(self, app_name, id_nodes, msg_out_list, distribution):
+        """
+        Add a group of pure source modules (sensors) driven by only one DES process. Each source has its own DES id
+        (registered as in :meth:`deploy_source`, so it can be stopped with :meth:`stop_process`) and its messages
+        are tagged with it, but the memory and the scheduling overhead depend on the number of groups.
+
+        Args:
+            app_name (str): application name
+
+            id_nodes (list): entity.id of the topology of each source (a node can be repeated)
+
+            msg_out_list (list): the messages generated by each source
+
+            distribution (Distribution or list): the distribution of all the sources (the time to the next
+            emission of each source is drawn from it) or a list with one distribution for each source
+
+        Returns:
+            a list with the DES id of each source
+        """
+        if isinstance(distribution, Distribution):
+            distributions = [distribution] * len(id_nodes)
+        else:
+            distributions = distribution
+        if len(distributions) != len(id_nodes):
+            raise ValueError("One distribution is required for each source")
+        if len(id_nodes) == 0:
+            return []
+
+        source_module = msg_out_list[0].src
+        source_msg_names = ''.join([t_msg.name for t_msg in msg_out_list])
+        ides_list = list(self.__get_id_range(len(id_nodes)))
+        self.des_process_running.update(dict.fromkeys(ides_list, True))
+        self.alloc_DES.update(zip(ides_list, id_nodes))
+        self.alloc_source.update(
+            (idDES, {"id": id_node, "app": app_name, "module": source_module, "names": source_msg_names})
+            for idDES, id_node in zip(ides_list, id_nodes))
+        self.env.process(self.__add_source_group(ides_list, app_name, msg_out_list, distributions))
+        return ides_list
+
     def __deploy_source_module(self, app_name, module, id_node, msg_out_list, distribution):
         """
         Add a DES process for deploy source modules
@@ -869,9 +1368,12 @@ class Sim:
         """
         idDES = self.__get_id_process()
         self.des_process_running[idDES] = True
-        self.env.process(self.__add_consumer_module(idDES, app_name, module, register_consumer_msg))
-        # To generate the QUEUE of a SERVICE module
-        self.__add_consumer_service_pipe(app_name, module, idDES)
+        if self.lazy_consumers:
+            self.__set_pending("%s-%s-%i" % (app_name, module, idDES), (idDES, app_name, module, register_consumer_msg))
+        else:
+            self.env.process(self.__add_consumer_module(idDES, app_name, module, register_consumer_msg))
+            # To generate the QUEUE of a SERVICE module
+            self.__add_consumer_service_pipe(app_name, module, idDES)
 
         self.alloc_DES[idDES] = id_node
         if module not in self.alloc_module[app_name]:
@@ -920,6 +1422,11 @@ class Sim:
             id.source (int): the identifier of the DES process.
         """
         self.des_process_running[id] = False
+        pipe_id = self.__pending_pipes.pop(id, None)
+        if pipe_id is not None:
+            # a lazy consumer is not activated any more, its messages wait in its pipe as with a stopped process
+            del self.pending_consumers[pipe_id]
+            self.consumer_pipes[pipe_id] = simpy.Store(self.env)
 
     def start_process(self, id):
         """
@@ -1075,6 +1582,63 @@ class Sim:
 
         return id_DES
 
+    def deploy_modules(self, app_name, placements):
+        """
+        Bulk version of :meth:`deploy_module`. The DES ids of consecutive consumer modules are allocated in one range
+        and the allocation tables are updated in one pass. As with :meth:`deploy_module`, the pipe and the process of
+        each consumer are created now, or on its first message with *lazy_consumers*.
+
+        Args:
+            app_name (str): application name
+
+            placements (list): (module, id_node) pairs, a module can be deployed in several nodes
+
+        Returns:
+            a list with the DES ids, in the same order as calling :meth:`deploy_module` for each pair
+        """
+        app = self.apps[app_name]
+        registers = {}
+        # module -> (services, register_consumer_msg), the register is None for a module with source services
+        id_DES = []
+        consumers = []
+        for module, id_node in placements:
+            if module not in registers:
+                services = app.services[module]
+                if isinstance(services, dict):
+                    services = [services]
+                register = [{"message_in_list": service["message_in_list"],
+                             "message_out_list": service["message_out_list"],
+                             "dist": service["dist"], "param": service["param"]}
+                            for service in services if service["type"] != Application.TYPE_SOURCE]
+                registers[module] = (services, register if len(register) == len(services) else None)
+            services, register = registers[module]
+            if register is None:
+                # the ids of the previous consumers are allocated first, as one by one
+                id_DES.extend(self.__deploy_consumer_range(app_name, consumers))
+                consumers = []
+                id_DES.extend(self.deploy_module(app_name, module, services, [id_node]))
+            else:
+                consumers.append((module, id_node, register))
+        id_DES.extend(self.__deploy_consumer_range(app_name, consumers))
+        return id_DES
+
+    def __deploy_consumer_range(self, app_name, consumers):
+        """
+        It deploys the (module, id_node, register_consumer_msg) consumers with a range of DES ids
+        """
+        alloc_module = self.alloc_module[app_name]
+        ids = self.__get_id_range(len(consumers))
+        for idDES, (module, id_node, register) in zip(ids, consumers):
+            self.des_process_running[idDES] = True
+            if self.lazy_consumers:
+                self.__set_pending("%s-%s-%i" % (app_name, module, idDES), (idDES, app_name, module, register))
+            else:
+                self.env.process(self.__add_consumer_module(idDES, app_name, module, register))
+                self.__add_consumer_service_pipe(app_name, module, idDES)
+            self.alloc_DES[idDES] = id_node
+            alloc_module.setdefault(module, []).append(idDES)
+        return ids
+
     def undeploy_all_modules(self, app_name, service_name, idtopo):
         """ removes all modules deployed in a node
         modules with the same name = service_name
@@ -1136,7 +1700,7 @@ class Sim:
                         v2.remove(item)
 
         # Finally removing node from topology
-        self.topology.G.remove_node(id_node_topology)
+        self.topology.remove_node(id_node_topology)
 
     def get_DES_from_Service_In_Node(self, node, app_name, service):
         deployed = self.alloc_module[app_name][service]
@@ -1176,30 +1740,32 @@ class Sim:
                   fullAssignation[k]["Module"] if k in fullAssignation.keys() else "--")
         print("-" * 40)
 
-    def run(self, until, show_progress_monitor=False, test_initial_deploy=False):
-
+    def __start(self, show_progress_monitor, warmup):
         """
-        Start the simulation
-
-        Args:
-            until (int): Defines a stop time. If None the simulation runs until some internal algorithm changes the var *yafs.core.sim.stop* to True
+        It creates the initial DES processes of :meth:`run` and :meth:`run_sequential`
         """
+        if warmup is not None:
+            self.metrics.set_warmup(warmup)
         self.env.process(self.__network_process())
 
-        """
-        Creating app.sources and deploy the sources in the topology
-        """
-        for pop in self.population_policy.items():
-            for app_name in pop[1]["apps"]:
-                pop[1]["population_policy"].initial_allocation(self, app_name)
+        if self.__restored is not None:
+            # a restored simulation continues with its own processes
+            self.__restart_processes()
+        else:
+            """
+            Creating app.sources and deploy the sources in the topology
+            """
+            for pop in self.population_policy.items():
+                for app_name in pop[1]["apps"]:
+                    pop[1]["population_policy"].initial_allocation(self, app_name)
 
-        """
-        Creating initial deploy of services
-        """
-        for place in self.placement_policy.items():
-            for app_name in place[1]["apps"]:
-                place[1]["placement_policy"].initial_allocation(self,
-                                                                app_name)  # internally consideres the apps in charge
+            """
+            Creating initial deploy of services
+            """
+            for place in self.placement_policy.items():
+                for app_name in place[1]["apps"]:
+                    place[1]["placement_policy"].initial_allocation(self,
+                                                                    app_name)  # internally consideres the apps in charge
 
         """
         A internal DES process will stop the simulation,
@@ -1218,11 +1784,100 @@ class Sim:
 
         self.print_debug_assignaments()
 
+    def run(self, until, show_progress_monitor=False, test_initial_deploy=False, checkpoint=None, warmup=None):
+
+        """
+        Start the simulation
+
+        Args:
+            until (int): Defines a stop time. If None the simulation runs until some internal algorithm changes the var *yafs.core.sim.stop* to True
+
+        Kwargs:
+            checkpoint (str): the state of the simulation at *until* is saved in this file (see :meth:`restore`). The
+            simulation has to be created with *checkpointing=True*. The distributions, policies, monitor functions and
+            the energy model have to be picklable
+
+            warmup (float or object): the metrics are not recorded until this time or until a steady-state detector
+            fires, i.e. *MSER5("M.A.B")* on the response time of a message (see :meth:`yafs.metrics.Metrics.set_warmup`).
+            The time when the recording started is *metrics.warmup_end*
+        """
+        if checkpoint is not None and not self.__checkpointing:
+            raise ValueError("A checkpoint needs a simulation created with checkpointing=True")
+        self.__start(show_progress_monitor, warmup)
+
         """
         RUN
         """
         self.until = until
-        if not test_initial_deploy:
-            self.env.run(until)  # This does not stop the simpy.simulation at time. We have to force the stop
+        try:
+            if not test_initial_deploy:
+                self.env.run(until)  # This does not stop the simpy.simulation at time. We have to force the stop
 
-        self.metrics.close()
+            if checkpoint is not None:
+                self.__write_checkpoint(checkpoint)
+
+            if self.energy_model is not None:
+                self.energy_model.close(self.env.now)
+        finally:
+            # the pending rows are written even if the simulation fails
+            self.metrics.close()
+
+    def run_sequential(self, estimator, batch_time, max_time, relative_width=0.05, confidence=0.95, min_batches=10,
+                       warmup=None, show_progress_monitor=False):
+        """
+        It simulates in batches of *batch_time* and it stops when the confidence intervals of the estimator are
+        narrow enough or at *max_time*
+
+        .. code-block:: python
+
+            result = s.run_sequential(BatchMeans(by="app"), batch_time=1000, max_time=100000, relative_width=0.02)
+
+        Args:
+            estimator (object): an online estimator of batch means, i.e. :class:`yafs.aggregation.BatchMeans` (by
+            default, of the end-to-end response time of each application). It is notified with the recorded events
+            and it implements *close_batch()*, *discard_batch()*, *converged(relative_width, confidence,
+            min_batches)* and *estimates(confidence)*
+
+            batch_time (float): simulation time of each batch
+
+            max_time (float): the simulation stops at this time anyway
+
+        Kwargs:
+            relative_width (float): target of the half width of the intervals divided by the means
+
+            confidence (float): confidence level of the intervals
+
+            min_batches (int): batches observed before the first check, at least 2
+
+            warmup (float or object): the warm-up is not recorded and it has no batches, the batch where it ends is
+            also discarded (see :meth:`run`)
+
+        Returns:
+            a dict with the simulation *time* when it stopped, *converged* (True if the target was achieved) and the
+            *estimates* of the estimator
+        """
+        if min_batches < 2:
+            raise ValueError("At least two batches are needed to estimate a confidence interval")
+        self.__start(show_progress_monitor, warmup)
+        self.metrics.observers.append(estimator)
+        self.until = max_time
+        converged = False
+        try:
+            while not converged and self.env.now < max_time:
+                warming = self.metrics.warming
+                self.env.run(min(self.env.now + batch_time, max_time))
+                if warming:
+                    # the batch where the warm-up ends is incomplete
+                    estimator.discard_batch()
+                    continue
+                estimator.close_batch()
+                converged = estimator.converged(relative_width, confidence, min_batches)
+
+            if self.energy_model is not None:
+                self.energy_model.close(self.env.now)
+        finally:
+            self.metrics.close()
+            self.metrics.observers.remove(estimator)
+
+        self.logger.info("Sequential stop at time %f, converged: %s" % (self.env.now, converged))
+        return {"time": self.env.now, "converged": converged, "estimates": estimator.estimates(confidence)}
@@ -19,6 +19,85 @@ class Distribution(object):
         None
 
 
+def spawn_seeds(seed, n):
+    """
+    Independent seeds for *n* random streams (i.e. one for each source of a simulation, or one for each
+    simulation of a parallel experiment) derived from one seed with numpy's SeedSequence
+
+    Returns:
+        a list of np.random.SeedSequence, each one can be the *seed* of a :class:`BufferedDistribution`
+    """
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+class BufferedDistribution(Distribution):
+    """
+    Abstract class of the distributions with their own random stream (a np.random.Generator with PCG64). The
+    variates are drawn in blocks and handed out one by one, so the cost per event is low and the sequence only
+    depends on the seed.
+
+    Kwargs:
+        seed (int or SeedSequence): the seed of the stream (see :func:`spawn_seeds`). None - a random seed
+
+        block (int): number of variates drawn at once
+    """
+
+    BLOCK = 4096
+
+    def __init__(self, seed=None, block=BLOCK, **kwargs):
+        super(BufferedDistribution, self).__init__(**kwargs)
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.rng = np.random.Generator(np.random.PCG64(seed))
+        self.block = block
+        self._buffer = []
+        self._position = 0
+
+    def draw(self, size):
+        """
+        Returns:
+            a np.array with *size* variates of the distribution
+        """
+        raise NotImplementedError
+
+    def next(self):
+        if self._position == len(self._buffer):
+            self._buffer = self.draw(self.block).tolist()
+            self._position = 0
+        value = self._buffer[self._position]
+        self._position += 1
+        return value
+
+
+class buffered_exponential_distribution(BufferedDistribution):
+    """
+    Integer exponential times (at least 1) of mean *lambd*, like :class:`exponential_distribution`
+    """
+
+    def __init__(self, lambd, **kwargs):
+        super(buffered_exponential_distribution, self).__init__(**kwargs)
+        self.l = lambd
+
+    def draw(self, size):
+        values = self.rng.exponential(self.l, size=size).astype(np.int64)
+        values[values == 0] = 1
+        return values
+
+
+class buffered_uniform_distribution(BufferedDistribution):
+    """
+    Integer times between *min* and *max* (both included), like :class:`uniformDistribution`
+    """
+
+    def __init__(self, min, max, **kwargs):
+        super(buffered_uniform_distribution, self).__init__(**kwargs)
+        self.min = min
+        self.max = max
+
+    def draw(self, size):
+        return self.rng.integers(self.min, self.max, size=size, endpoint=True)
+
+
 class deterministic_distribution(Distribution):
     def __init__(self, time, **kwargs):
         super(deterministic_distribution, self).__init__(**kwargs)
@@ -52,9 +131,13 @@ class exponentialDistribution(Distribution):
         super(exponentialDistribution, self).__init__(**kwargs)
         self.l = lambd
         self.rnd = np.random.RandomState(seed)
+        self._buffer = []
 
     def next(self):
-        value = int(self.rnd.exponential(self.l, size=1)[0])
+        # the blocks of RandomState.exponential give the same sequence than one draw per call
+        if not self._buffer:
+            self._buffer = self.rnd.exponential(self.l, size=BufferedDistribution.BLOCK).tolist()[::-1]
+        value = int(self._buffer.pop())
         if value==0: return 1
         return value
 
@@ -64,34 +147,63 @@ class exponential_distribution(Distribution):
         super(exponential_distribution, self).__init__(**kwargs)
         self.l = lambd
         self.rnd = np.random.RandomState(seed)
+        self._buffer = []
 
     def next(self):
-        value = int(self.rnd.exponential(self.l, size=1)[0])
+        # the blocks of RandomState.exponential give the same sequence than one draw per call
+        if not self._buffer:
+            self._buffer = self.rnd.exponential(self.l, size=BufferedDistribution.BLOCK).tolist()[::-1]
+        value = int(self._buffer.pop())
         if value==0: return 1
         return value
 
 
 class exponentialDistributionStartPoint(Distribution):
-    def __init__(self,start,lambd, **kwargs):
+    """
+    Kwargs:
+        seed (int or SeedSequence): the seed of its own random stream. None - the global np.random is used
+    """
+    def __init__(self,start,lambd,seed=None, **kwargs):
         self.lambd = lambd
         self.start = start
         self.started = False
+        self.rng = None
+        if seed is not None:
+            self.rng = np.random.Generator(np.random.PCG64(seed))
+            self._buffer = []
         super(exponentialDistributionStartPoint, self).__init__(**kwargs)
 
     def next(self):
         if not self.started:
             self.started = True
             return self.start
-        else:
+        elif self.rng is None:
             return int(np.random.exponential(self.lambd, size=1)[0])
+        else:
+            if not self._buffer:
+                self._buffer = self.rng.exponential(self.lambd, size=BufferedDistribution.BLOCK).tolist()[::-1]
+            return int(self._buffer.pop())
 
 class uniformDistribution(Distribution):
-    def __init__(self, min,max, **kwargs):
+    """
+    Kwargs:
+        seed (int or SeedSequence): the seed of its own random stream. None - the global random is used
+    """
+    def __init__(self, min,max,seed=None, **kwargs):
         self.min = min
         self.max = max
+        self.rng = None
+        if seed is not None:
+            self.rng = np.random.Generator(np.random.PCG64(seed))
+            self._buffer = []
         super(uniformDistribution, self).__init__(**kwargs)
     def next(self):
-        return random.randint(self.min, self.max)
+        if self.rng is None:
+            return random.randint(self.min, self.max)
+        if not self._buffer:
+            self._buffer = self.rng.integers(self.min, self.max, size=BufferedDistribution.BLOCK,
+                                             endpoint=True).tolist()[::-1]
+        return self._buffer.pop()
 
 class oneoffDistribution(Distribution):
     def __init__(self,time, **kwargs):
@@ -103,4 +215,165 @@ class oneoffDistribution(Distribution):
         if not self.sent:
             self.sent = True
             return self.time
-        return math.inf
\ No newline at end of file
+        return math.inf
+
+
+class trace_distribution(Distribution):
+    """
+    It replays the inter-arrival times of a trace. The values are read lazily in blocks, so only a block of each
+    source is in memory. The .npy traces are memory-mapped once and shared by all the sources that read them until
+    :meth:`close` (see :func:`save_trace`). A CSV trace is converted once with :func:`csv_to_trace`.
+
+    Args:
+        path (str): a .npy file
+
+    Kwargs:
+        offset (int): position of the first value of the source
+
+        count (int): number of values of the source. By default: until the end of the file
+
+        timestamps (boolean): True - the values are sorted arrival times instead of inter-arrival times
+
+        loop (boolean): True - the trace is replayed again at the end. False - there are no more arrivals (math.inf)
+
+        block (int): number of values read at once
+    """
+
+    _maps = {}
+    # path -> memory-mapped array
+
+    def __init__(self, path, offset=0, count=None, timestamps=False, loop=False, block=4096, **kwargs):
+        super(trace_distribution, self).__init__(**kwargs)
+        if not path.endswith(".npy"):
+            raise ValueError("A trace has to be a .npy file, convert %s with csv_to_trace" % path)
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.timestamps = timestamps
+        self.loop = loop
+        self.block = block
+        self._blocks = None
+        self._buffer = []
+        self._last = 0.0
+        self._replayed = 0
+        self._consumed = 0
+        # values of the current pass consumed before a checkpoint, the reader starts after them
+
+    def __getstate__(self):
+        # the reader of blocks is a generator, it is rebuilt from the number of values consumed in this pass
+        state = self.__dict__.copy()
+        state["_blocks"] = None
+        state["_buffer"] = []
+        if self._blocks is not None:
+            state["_consumed"] = self._replayed - len(self._buffer)
+        return state
+
+    @classmethod
+    def open(cls, path):
+        """
+        Returns:
+            the memory-mapped array of a .npy trace
+        """
+        if path not in cls._maps:
+            cls._maps[path] = np.load(path, mmap_mode="r")
+        return cls._maps[path]
+
+    @classmethod
+    def close(cls, path=None):
+        """
+        It releases the memory-mapped array of a trace, or of all of them. A source that reads it again maps it again
+        """
+        if path is None:
+            cls._maps.clear()
+        else:
+            cls._maps.pop(path, None)
+
+    def __read_blocks(self, skip=0):
+        values = self.open(self.path)
+        end = len(values) if self.count is None else min(len(values), self.offset + self.count)
+        for start in range(self.offset + skip, end, self.block):
+            yield values[start:min(start + self.block, end)].tolist()
+
+    def next(self):
+        while not self._buffer:
+            if self._blocks is None:
+                self._blocks = self.__read_blocks(self._consumed)
+                if not self._consumed:
+                    self._last = 0.0
+                self._replayed = self._consumed
+                self._consumed = 0
+            try:
+                self._buffer = next(self._blocks)[::-1]
+                self._replayed += len(self._buffer)
+            except StopIteration:
+                if not self.loop or self._replayed == 0:
+                    return math.inf
+                self._blocks = None
+        value = self._buffer.pop()
+        if self.timestamps:
+            value, self._last = value - self._last, value
+        return value
+
+
+def csv_to_trace(csv_path, path, column=None, chunksize=1000000):
+    """
+    It converts a column of a CSV trace to the .npy file read by :class:`trace_distribution`. The CSV file is read
+    twice in chunks (to count the rows and to copy them), so it is never loaded in memory
+
+    Args:
+        csv_path (str): the CSV file
+
+        path (str): the .npy file
+
+    Kwargs:
+        column (str): column of the CSV file. By default: the first one
+
+        chunksize (int): number of rows read at once
+
+    Returns:
+        the number of values, the offset of each source is the position of its first row in the CSV file
+    """
+    import pandas as pd
+    usecols = [0] if column is None else [column]
+    rows = sum(len(chunk) for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize))
+    data = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(rows,))
+    start = 0
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize):
+        data[start:start + len(chunk)] = chunk.iloc[:, 0].values
+        start += len(chunk)
+    data.flush()
+    del data
+    trace_distribution.close(path)
+    return rows
+
+
+def save_trace(path, traces, sources=None):
+    """
+    It stores the traces of several sources in one .npy file, one after the other
+
+    Args:
+        path (str): the .npy file
+
+        traces (dict): source -> list of inter-arrival times (or arrival times)
+
+    Kwargs:
+        sources (dict): source -> dict with the other columns of its row, at least the *node* and the *message*
+        required by :class:`yafs.population.TracePopulation`, i.e. {"node": 3, "message": "M.1.A"}
+
+    Returns:
+        a list of dicts with the source, path, offset and count of each trace and the columns of *sources*. With the
+        node and the message of each source it is the index of :class:`yafs.population.TracePopulation`; without
+        *sources* those columns have to be added to the rows before
+    """
+    index = []
+    offset = 0
+    for source, values in traces.items():
+        row = {"source": source, "path": path, "offset": offset, "count": len(values)}
+        if sources is not None:
+            row.update(sources[source])
+        index.append(row)
+        offset += len(values)
+    data = np.concatenate([np.asarray(values, dtype=np.float64) for values in traces.values()]) if traces \
+        else np.zeros(0)
+    np.save(path, data)
+    return index
@@ -1,6 +1,272 @@
 import csv
+import json
+import queue
+import threading
+
+import numpy as np
+
+
+class CSVTraceWriter(object):
+    """
+    It writes the rows of a trace in <path>.csv
+
+    Kwargs:
+        resume (int): an :meth:`offset` of the file, it is truncated there and the new rows are appended
+    """
+
+    def __init__(self, path, columns, resume=None):
+        if resume is None:
+            self.__file = open("%s.csv" % path, "w")
+        else:
+            self.__file = open("%s.csv" % path, "r+")
+            self.__file.seek(resume)
+            self.__file.truncate()
+        self.__writer = csv.writer(self.__file)
+        if resume is None:
+            self.__writer.writerow([name for name, kind in columns])
+
+    def offset(self):
+        """
+        Returns:
+            the position of the end of the written rows (after a flush)
+        """
+        return self.__file.tell()
+
+    def write(self, row):
+        self.__writer.writerow(row)
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+
+class BinaryTraceWriter(object):
+    """
+    It writes the rows of a trace as fixed-width records in <path>.bin. Numeric columns are stored as int64 or
+    float64 and string columns are dictionary-encoded as int32 codes. The dictionaries and the layout are stored in
+    <path>.bin.json (see :func:`open_binary_trace`).
+
+    Args:
+        path (str): path of the trace without extension
+
+        columns (list): (name, kind) pairs, kind is "i8", "f8" or "cat"
+
+    Kwargs:
+        batch (int): number of rows encoded and written together
+
+        resume (dict): an :meth:`offset` of the trace, the records after it are discarded and the new rows are
+        appended with the same dictionaries
+    """
+
+    KINDS = {"i8": "<i8", "f8": "<f8", "cat": "<i4"}
+
+    def __init__(self, path, columns, batch=10000, resume=None):
+        self.path = path
+        self.columns = columns
+        self.batch = batch
+        self.dtype = np.dtype([(name, self.KINDS[kind]) for name, kind in columns])
+        self.categories = {name: {} for name, kind in columns if kind == "cat"}
+        self.rows = 0
+        if resume is not None:
+            for name, values in resume["categories"].items():
+                self.categories[name] = {value: code for code, value in enumerate(values)}
+            self.rows = resume["rows"]
+        self.__cat_positions = [(i, self.categories[name]) for i, (name, kind) in enumerate(columns)
+                                if kind == "cat"]
+        self.__pending = []
+        if resume is None:
+            self.__file = open("%s.bin" % path, "wb")
+        else:
+            self.__file = open("%s.bin" % path, "r+b")
+            self.__file.seek(self.rows * self.dtype.itemsize)
+            self.__file.truncate()
+
+    def write(self, row):
+        for i, dictionary in self.__cat_positions:
+            value = row[i]
+            if not isinstance(value, str):
+                value = str(value)
+            try:
+                row[i] = dictionary[value]
+            except KeyError:
+                row[i] = dictionary[value] = len(dictionary)
+        self.__pending.append(tuple(row))
+        if len(self.__pending) >= self.batch:
+            self.__write_pending()
+
+    def __write_pending(self):
+        if self.__pending:
+            np.array(self.__pending, dtype=self.dtype).tofile(self.__file)
+            self.rows += len(self.__pending)
+            self.__pending = []
+
+    def flush(self):
+        self.__write_pending()
+        self.__file.flush()
+        with open("%s.bin.json" % self.path, "w") as f:
+            json.dump({"columns": self.columns, "rows": self.rows,
+                       "categories": {name: list(dictionary) for name, dictionary in self.categories.items()}}, f)
+
+    def offset(self):
+        """
+        Returns:
+            the number of written rows and the dictionaries (after a flush)
+        """
+        return {"rows": self.rows,
+                "categories": {name: list(dictionary) for name, dictionary in self.categories.items()}}
+
+    def close(self):
+        self.flush()
+        self.__file.close()
+
+
+def open_binary_trace(path):
+    """
+    It maps a binary trace without reading it
+
+    Args:
+        path (str): path of the trace without extension, i.e. "result" or "result_link"
+
+    Returns:
+        a structured np.memmap with one field for each column and a dict with the categories of the string columns
+    """
+    with open("%s.bin.json" % path) as f:
+        meta = json.load(f)
+    dtype = np.dtype([(name, BinaryTraceWriter.KINDS[kind]) for name, kind in meta["columns"]])
+    if meta["rows"] == 0:
+        return np.zeros(0, dtype=dtype), meta["categories"]
+    records = np.memmap("%s.bin" % path, dtype=dtype, mode="r", shape=(meta["rows"],))
+    return records, meta["categories"]
+
+
+def read_binary_trace(path, columns=None, chunksize=None):
+    """
+    Args:
+        path (str): path of the trace without extension
+
+    Kwargs:
+        columns (list): only these columns are read
+
+        chunksize (int): it returns an iterator of DataFrames with *chunksize* rows
+
+    Returns:
+        a DataFrame of a binary trace, the string columns are pandas categoricals built from the codes
+    """
+    import pandas as pd
+    records, categories = open_binary_trace(path)
+    if columns is None:
+        columns = list(records.dtype.names)
+
+    # the codes follow the order of appearance, the categories are sorted as pandas does with the strings
+    recode = {}
+    for name in columns:
+        if name in categories:
+            order = np.argsort(categories[name])
+            rank = np.empty(len(order), dtype=np.int32)
+            rank[order] = np.arange(len(order), dtype=np.int32)
+            recode[name] = (rank, [categories[name][i] for i in order])
+
+    def frame(records):
+        data = {}
+        for name in columns:
+            if name in recode:
+                rank, sorted_categories = recode[name]
+                data[name] = pd.Categorical.from_codes(rank[records[name]], sorted_categories)
+            else:
+                data[name] = records[name]
+        return pd.DataFrame(data, columns=columns)
+
+    if chunksize is None:
+        return frame(records)
+    return (frame(records[start:start + chunksize]) for start in range(0, len(records), chunksize))
+
+
+class RecordingPolicy(object):
+    """
+    It selects the events recorded by :class:`Metrics`. The simulator checks it before building each record, so the
+    discarded events cost nothing (neither in the traces nor in the aggregator).
+
+    Kwargs:
+        apps (list): only the events of these applications. By default: all
+
+        modules (list): only the events of these modules (the destination module in the transmissions). By default: all
+
+        messages (list): only the events of these messages. By default: all
+
+        sample_rate (float): fraction of the requests recorded. The decision is a hash of the message *id*, so all
+        the events of a request are kept or dropped together and the sample is the same in each run
+
+        seed (int): another seed selects another sample
+    """
+
+    HASH_MASK = (1 << 64) - 1
+
+    def __init__(self, apps=None, modules=None, messages=None, sample_rate=1.0, seed=0):
+        self.apps = None if apps is None else frozenset(apps)
+        self.modules = None if modules is None else frozenset(modules)
+        self.messages = None if messages is None else frozenset(messages)
+        self.sample_rate = sample_rate
+        self.seed = seed
+        self.__threshold = int(sample_rate * self.HASH_MASK)
+
+    def sampled(self, id):
+        """
+        Returns:
+            True if the request *id* is in the sample
+        """
+        if self.sample_rate >= 1.0:
+            return True
+        # splitmix64 finalizer
+        h = (id + self.seed * 0x9E3779B97F4A7C15) & self.HASH_MASK
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & self.HASH_MASK
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & self.HASH_MASK
+        return (h ^ (h >> 31)) < self.__threshold
+
+    def accept(self, id, app, module, message):
+        """
+        Returns:
+            True if the event has to be recorded
+        """
+        if self.apps is not None and app not in self.apps:
+            return False
+        if self.modules is not None and module not in self.modules:
+            return False
+        if self.messages is not None and message not in self.messages:
+            return False
+        return self.sampled(id)
+
 
 class Metrics:
+    """
+    It records the events of the simulation in <path>.csv and the transmissions in <path>_link.csv
+
+    Kwargs:
+        default_results_path (str): path of the result files without extension. By default: "result"
+
+        trace (boolean): False - the raw traces are not written
+
+        aggregator (object): an online summary updated with each event, i.e. :class:`yafs.aggregation.MetricsAggregator`
+
+        trace_format (str): FORMAT_CSV or FORMAT_BINARY (<path>.bin and <path>_link.bin, see :class:`BinaryTraceWriter`)
+
+        background (boolean): True - the rows are queued in batches and a background thread writes them, so the
+        file I/O overlaps with the simulation
+
+        batch (int): number of rows of a batch in background mode
+
+        max_batches (int): size of the queue in background mode; when it is full the simulation waits for the writer
+
+        policy (RecordingPolicy): the events recorded. By default: all
+
+        resume (tuple): the offsets of the traces in a :meth:`checkpoint`, the traces are truncated there and continued
+
+        warmup (float or object): the warm-up excluded from the records (see :meth:`set_warmup`)
+
+        observers (list): other online estimators notified with each recorded event, *insert(value)*, i.e.
+        :class:`yafs.aggregation.BatchMeans`
+    """
 
     TIME_LATENCY = "time_latency"
     TIME_WAIT =  "time_wait"
@@ -11,58 +277,204 @@ class Metrics:
     WATT_SERVICE = "byService"
     WATT_UPTIME = "byUptime"
 
+    FORMAT_CSV = "csv"
+    FORMAT_BINARY = "binary"
+
+    EVENT_COLUMNS = [("id", "i8"), ("type", "cat"), ("app", "cat"), ("module", "cat"), ("message", "cat"),
+                     ("DES.src", "cat"), ("DES.dst", "i8"), ("TOPO.src", "i8"), ("TOPO.dst", "i8"),
+                     ("module.src", "cat"), ("service", "f8"), ("time_in", "f8"), ("time_out", "f8"),
+                     ("time_emit", "f8"), ("time_reception", "f8")]
+    "Columns of the events and their type in the binary format"
 
-    def __init__(self, default_results_path=None):
-        columns_event = ["id","type", "app", "module", "message","DES.src","DES.dst","TOPO.src","TOPO.dst","module.src","service", "time_in","time_out",
-                         "time_emit","time_reception"]
-        columns_link = ["id","type", "src", "dst", "app", "latency", "message", "ctime", "size","buffer"]
+    LINK_COLUMNS = [("id", "i8"), ("type", "cat"), ("src", "i8"), ("dst", "i8"), ("app", "cat"), ("latency", "f8"),
+                    ("message", "cat"), ("ctime", "f8"), ("size", "f8"), ("buffer", "i8"), ("shift", "f8")]
+    "Columns of the transmissions and their type in the binary format"
 
+    def __init__(self, default_results_path=None, trace=True, aggregator=None, trace_format=FORMAT_CSV,
+                 background=False, batch=10000, max_batches=16, policy=None, resume=None, warmup=None,
+                 observers=None):
         path = "result"
         if  default_results_path is not None:
             path = default_results_path
 
-        self.__filef = open("%s.csv" % path, "w")
-        self.__filel = open("%s_link.csv"%path, "w")
-        self.__ff = csv.writer(self.__filef)
-        self.__ff_link = csv.writer(self.__filel)
-        self.__ff.writerow(columns_event)
-        self.__ff_link.writerow(columns_link)
+        self.path = path
+        self.trace = trace
+        self.trace_format = trace_format
+        self.aggregator = aggregator
+        self.observers = list(observers or [])
+        self.policy = policy
+        self.background = background and trace
+        self.batch = batch
+        self.max_batches = max_batches
+        self.set_warmup(warmup)
+        self.__event_keys = [name for name, kind in self.EVENT_COLUMNS]
+        self.__link_keys = [name for name, kind in self.LINK_COLUMNS]
+        if not trace:
+            return
+
+        if trace_format == self.FORMAT_CSV:
+            writer = CSVTraceWriter
+        elif trace_format == self.FORMAT_BINARY:
+            writer = BinaryTraceWriter
+        else:
+            raise ValueError("Unknown trace format: %s" % trace_format)
+        if resume is None:
+            resume = (None, None)
+        self.__ff = writer(path, self.EVENT_COLUMNS, resume=resume[0])
+        self.__ff_link = writer("%s_link" % path, self.LINK_COLUMNS, resume=resume[1])
+
+        if self.background:
+            self.__rows = []
+            self.__rows_link = []
+            self.__queue = queue.Queue(maxsize=max_batches)
+            self.__error = None
+            self.__thread = threading.Thread(target=self.__write_batches, name="metrics-writer", daemon=True)
+            self.__thread.start()
+
+    def __write_batches(self):
+        """
+        Body of the background writer: it writes the batches of the queue until the sentinel (None)
+        """
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is None:
+                    return
+                if self.__error is None:
+                    writer, rows = item
+                    for row in rows:
+                        writer.write(row)
+            except Exception as e:
+                # the batches are still consumed so the simulation is never blocked
+                self.__error = e
+            finally:
+                self.__queue.task_done()
+
+    def __put(self, writer, rows):
+        if self.__error is not None:
+            raise self.__error
+        self.__queue.put((writer, rows))
+
+    def __check_error(self):
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
 
     def flush(self):
-        self.__filef.flush()
-        self.__filel.flush()
+        if not self.trace:
+            return
+        if self.background:
+            self.__put(self.__ff, self.__rows)
+            self.__put(self.__ff_link, self.__rows_link)
+            self.__rows, self.__rows_link = [], []
+            self.__queue.join()
+            self.__check_error()
+        self.__ff.flush()
+        self.__ff_link.flush()
+
+    def set_warmup(self, warmup):
+        """
+        The events (and transmissions) of the warm-up are neither written nor aggregated
+
+        Args:
+            warmup (float or object): the warm-up ends at this simulation time, or when a steady-state detector fires
+            (i.e. :class:`yafs.aggregation.MSER5`). A detector receives the events with *insert(value)* and returns
+            True when the steady state is reached. None - there is no warm-up
+        """
+        self.warming = warmup is not None
+        self.warmup_time = None
+        self.detector = None
+        if hasattr(warmup, "insert"):
+            self.detector = warmup
+        else:
+            self.warmup_time = warmup
+        self.warmup_end = None if self.warming else 0.0
+        "Simulation time when the recording started"
+
+    def __end_warmup(self, time):
+        self.warming = False
+        self.warmup_end = time
+
+    def checkpoint(self):
+        """
+        It writes the pending rows
+
+        Returns:
+            a dict with the arguments to create a Metrics that continues these traces, *Metrics(**state)*
+        """
+        self.flush()
+        state = {"default_results_path": self.path, "trace": self.trace, "aggregator": self.aggregator,
+                 "trace_format": self.trace_format, "background": self.background, "batch": self.batch,
+                 "max_batches": self.max_batches, "policy": self.policy,
+                 "warmup": (self.detector or self.warmup_time) if self.warming else None,
+                 "observers": self.observers}
+        if self.trace:
+            state["resume"] = (self.__ff.offset(), self.__ff_link.offset())
+        return state
 
     def insert(self,value):
+        if self.warming:
+            if self.detector is not None:
+                # the events observed by the detector are part of the warm-up
+                if self.detector.insert(value):
+                    self.__end_warmup(value["time_in"])
+                return
+            if value["time_in"] < self.warmup_time:
+                return
+            self.__end_warmup(value["time_in"])
+
+        if self.aggregator is not None:
+            self.aggregator.insert(value)
+        for observer in self.observers:
+            observer.insert(value)
+        if not self.trace:
+            return
 
-        self.__ff.writerow([value["id"],value["type"],
-                    value["app"],
-                    value["module"],
-                    value["message"],
-                    value["DES.src"],
-                    value["DES.dst"],
-                    value["TOPO.src"],
-                    value["TOPO.dst"],
-                    value["module.src"],
-                    value["service"],
-                    value["time_in"],
-                    value["time_out"],
-                    value["time_emit"],
-                    value["time_reception"]
-                            ])
+        row = [value[key] for key in self.__event_keys]
+        if self.background:
+            self.__rows.append(row)
+            if len(self.__rows) >= self.batch:
+                self.__put(self.__ff, self.__rows)
+                self.__rows = []
+        else:
+            self.__ff.write(row)
 
     def insert_link(self, value):
-        self.__ff_link.writerow([value["id"],value["type"],
-                    value["src"],
-                    value["dst"],
-                    value["app"],
-                    value["latency"],
-                    value["message"],
-                    value["ctime"],
-                    value["size"],
-                    value["buffer"],
-
-                            ])
+        if self.warming:
+            if self.detector is not None or value["ctime"] < self.warmup_time:
+                return
+            self.__end_warmup(value["ctime"])
+
+        if self.aggregator is not None:
+            self.aggregator.insert_link(value)
+        if not self.trace:
+            return
+
+        row = [value[key] for key in self.__link_keys]
+        if self.background:
+            self.__rows_link.append(row)
+            if len(self.__rows_link) >= self.batch:
+                self.__put(self.__ff_link, self.__rows_link)
+                self.__rows_link = []
+        else:
+            self.__ff_link.write(row)
 
     def close(self):
-        self.__filef.close()
-        self.__filel.close()
+        """
+        It writes the pending rows and closes the files. In background mode it waits for the writer thread and
+        raises its error, if any.
+        """
+        if not self.trace:
+            return
+        if self.background and self.__thread.is_alive():
+            self.__queue.put((self.__ff, self.__rows))
+            self.__queue.put((self.__ff_link, self.__rows_link))
+            self.__rows, self.__rows_link = [], []
+            self.__queue.put(None)
+            self.__thread.join()
+        try:
+            if self.background:
+                self.__check_error()
+        finally:
+            self.__ff.close()
+            self.__ff_link.close()
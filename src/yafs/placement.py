@@ -71,14 +71,9 @@ class JSONPlacement(Placement):
         self.data = json
 
     def initial_allocation(self, sim, app_name):
-        for item in self.data["initialAllocation"]:
-            if app_name == item["app"]:
-                # app_name = item["app"]
-                module = item["module_name"]
-                idtopo = item["id_resource"]
-                app = sim.apps[app_name]
-                services = app.services
-                idDES = sim.deploy_module(app_name, module, services[module],[idtopo])
+        placements = [(item["module_name"], item["id_resource"]) for item in self.data["initialAllocation"]
+                      if app_name == item["app"]]
+        sim.deploy_modules(app_name, placements)
 
 
 class JSONPlacementOnCloud(Placement):
@@ -8,6 +8,8 @@
 """
 import logging
 
+from yafs.distribution import trace_distribution
+
 
 class Population(object):
     """
@@ -87,7 +89,11 @@ class Statical(Population):
 
     def initial_allocation(self, sim, app_name):
         # Assignment of SINK and SOURCE pure modules
-        for id_entity in sim.topology.nodeAttributes:
+        # the sources of a control with "group": True are driven by one process (see Sim.deploy_source_group)
+        groups = [[] for ctrl in self.src_control]
+        # only the nodes of the models of the controls, in the order of the topology (see Topology.find_IDs_in)
+        models = [ctrl["model"] for ctrl in self.sink_control] + [ctrl["model"] for ctrl in self.src_control]
+        for id_entity in sim.topology.find_IDs_in("model", models):
             entity = sim.topology.nodeAttributes[id_entity]
             for ctrl in self.sink_control:
                 # A node can have several sinks modules
@@ -98,15 +104,97 @@ class Statical(Population):
                         sim.deploy_sink(app_name, node=id_entity, module=module)
             # end for sink control
 
-            for ctrl in self.src_control:
+            for i, ctrl in enumerate(self.src_control):
                 # A node can have several source modules
                 if entity["model"] == ctrl["model"]:
                     msg_list = ctrl["message_out_list"]
                     dst = ctrl["distribution"]
+                    if ctrl.get("group", False):
+                        groups[i].extend([id_entity] * ctrl["number"])
+                        continue
                     for number in range(ctrl["number"]):
                         idsrc = sim.deploy_source(app_name, id_node=id_entity, msg_out_list=msg_list, distribution=dst)
                         # the idsrc can be used to control the deactivation of the process in a dynamic behaviour
 
             # end for src control
 
+        for ctrl, id_nodes in zip(self.src_control, groups):
+            if id_nodes:
+                sim.deploy_source_group(app_name, id_nodes, ctrl["message_out_list"], ctrl["distribution"])
+
         # end assignments
+
+
+def _row_value(row, key, default=None):
+    # the missing values of a CSV index are NaN
+    value = row.get(key)
+    if value is None or value != value:
+        return default
+    return value
+
+
+class TracePopulation(Statical):
+    """
+    This population replays a trace of arrivals: it deploys a source for each row of a trace index and each source
+    emits its message at the times of its own trace (see :class:`yafs.distribution.trace_distribution`). The sinks
+    and other sources of *sink_control* and *src_control* are deployed as in :class:`Statical`.
+
+    Args:
+        name (str): associated name
+
+        index (str or list): a CSV file (read in chunks) or a list of dicts with the columns:
+            node (topology entity id), message (name of the message emitted), path (a .npy trace, see
+            :func:`yafs.distribution.csv_to_trace`), and optionally offset, count, app (the rows of other applications
+            are ignored) and timestamps (see :func:`yafs.distribution.save_trace`)
+
+    Kwargs:
+        chunksize (int): number of rows of the CSV index read at once
+
+        loop (boolean): True - the traces are replayed again at their end
+
+        group (boolean): True - the sources of each message are driven by one process (see Sim.deploy_source_group)
+    """
+
+    def __init__(self, name, index, chunksize=100000, loop=False, group=False, **kwargs):
+        super(TracePopulation, self).__init__(name, **kwargs)
+        self.index = index
+        self.chunksize = chunksize
+        self.loop = loop
+        self.group = group
+
+    def rows(self):
+        """
+        It iterates the rows of the index as dicts
+        """
+        if isinstance(self.index, str):
+            import pandas as pd
+            for chunk in pd.read_csv(self.index, chunksize=self.chunksize):
+                for row in chunk.to_dict("records"):
+                    yield row
+        else:
+            for row in self.index:
+                yield row
+
+    def initial_allocation(self, sim, app_name):
+        super(TracePopulation, self).initial_allocation(sim, app_name)
+        app = sim.apps[app_name]
+        groups = {}
+        # message name -> (nodes, distributions)
+        for row in self.rows():
+            if _row_value(row, "app", app_name) != app_name:
+                continue
+            count = _row_value(row, "count")
+            distribution = trace_distribution(path=row["path"], offset=int(_row_value(row, "offset", 0)),
+                                              count=None if count is None else int(count),
+                                              timestamps=bool(_row_value(row, "timestamps", False)),
+                                              loop=self.loop, name="Trace")
+            if self.group:
+                nodes, distributions = groups.setdefault(row["message"], ([], []))
+                nodes.append(int(row["node"]))
+                distributions.append(distribution)
+            else:
+                sim.deploy_source(app_name, id_node=int(row["node"]), msg_out_list=[app.get_message(row["message"])],
+                                  distribution=distribution)
+
+        for message, (nodes, distributions) in groups.items():
+            sim.deploy_source_group(app_name, nodes, [app.get_message(message)], distributions)
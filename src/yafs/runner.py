@@ -0,0 +1,205 @@
+"""
+This module runs a grid of independent simulations (scenario x seed x parameters) in a pool of processes.
+
+Each run has its own results folder and its own random state, a failed run does not stop the others and the values
+returned by all the runs are merged in one summary.
+
+.. code-block:: python
+
+    def experiment(scenario, seed, path, rate):
+        s = Sim(t, default_results_path=path + "trace")
+        ...
+        s.run(10000)
+        return {"requests": len(Stats(path + "trace").df)}
+
+    summary = run_grid(experiment, ["small", "large"], range(10), {"rate": [10, 100]}, results_path="results/")
+
+"""
+import itertools
+import logging
+import os
+import random
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_CRASHED = "crashed"
+
+
+def expand_grid(scenarios, seeds, parameters=None):
+    """
+    Args:
+        scenarios (list): names of the scenarios
+
+        seeds (list): a run is done for each seed
+
+    Kwargs:
+        parameters (dict): parameter name -> list of values, all the combinations are simulated
+
+    Returns:
+        a list of runs, a dict with the keys run, scenario, seed and params
+    """
+    parameters = parameters or {}
+    names = sorted(parameters)
+    runs = []
+    for scenario, values, seed in itertools.product(scenarios, itertools.product(*[parameters[n] for n in names]),
+                                                    seeds):
+        runs.append({"run": len(runs), "scenario": scenario, "seed": seed, "params": dict(zip(names, values))})
+    return runs
+
+
+def seed_run(seed):
+    """
+    It sets the global states of *random* and *numpy.random* (used by the YAFS policies and distributions) from
+    a SeedSequence of the seed, so each run is reproducible and independent of the process that executes it
+
+    Returns:
+        the SeedSequence of the run, it can spawn the seeds of other generators
+    """
+    sequence = np.random.SeedSequence(seed)
+    state = sequence.generate_state(2, dtype=np.uint32)
+    random.seed(int(state[0]))
+    np.random.seed(int(state[1]))
+    return sequence
+
+
+def _run_path(results_path, run):
+    name = "%s_%i" % (run["scenario"], run["seed"])
+    for key, value in sorted(run["params"].items()):
+        name += "_%s-%s" % (key, value)
+    return os.path.join(results_path, "%05i_%s" % (run["run"], name)) + os.sep
+
+
+def _marker(run):
+    # it exists while the run is executed, so the runs that were executing when a worker died are known
+    return os.path.join(run["path"], ".running")
+
+
+def _execute(function, run):
+    """
+    Body of each run in the worker process: the exceptions are returned as a result
+    """
+    result = {"status": STATUS_OK, "error": None}
+    start = time.time()
+    try:
+        os.makedirs(run["path"], exist_ok=True)
+        open(_marker(run), "w").close()
+        seed_run(run["seed"])
+        values = function(run["scenario"], run["seed"], run["path"], **run["params"])
+        result["values"] = values or {}
+    except Exception:
+        result["status"] = STATUS_ERROR
+        result["error"] = traceback.format_exc()
+        result["values"] = {}
+    result["elapsed"] = time.time() - start
+    if os.path.exists(_marker(run)):
+        os.remove(_marker(run))
+    return result
+
+
+def _crashed(run, error):
+    if os.path.exists(_marker(run)):
+        os.remove(_marker(run))
+    return {"status": STATUS_CRASHED, "error": error, "values": {}, "elapsed": None}
+
+
+def _execute_pool(function, runs, processes, results):
+    """
+    It executes the runs in a pool. When a worker dies (i.e. out of memory) the pool is broken and all its pending
+    runs fail: the runs that were not started are executed again in a new pool and the runs that were executing are
+    executed again one by one, so only the run that kills its worker is *crashed*
+    """
+    while runs:
+        broken = []
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [(run, pool.submit(_execute, function, run)) for run in runs]
+            for run, future in futures:
+                try:
+                    results[run["run"]] = future.result()
+                except BrokenProcessPool:
+                    broken.append(run)
+
+        started = [run for run in broken if os.path.exists(_marker(run))]
+        runs = [run for run in broken if not os.path.exists(_marker(run))]
+        if broken and not started:
+            # no run was started, the pool cannot execute them
+            for run in runs:
+                results[run["run"]] = _crashed(run, "The pool of processes could not start the run")
+            return
+        for run in started:
+            os.remove(_marker(run))
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                try:
+                    results[run["run"]] = pool.submit(_execute, function, run).result()
+                except BrokenProcessPool:
+                    results[run["run"]] = _crashed(run, traceback.format_exc())
+
+
+def run_grid(function, scenarios, seeds, parameters=None, results_path="results", processes=None,
+             summary_file="summary.csv", logger=None):
+    """
+    It executes function(scenario, seed, path, **params) for each combination of the grid
+
+    Args:
+        function (function): a module level function (it has to be pickled); it returns a dict of values or None
+
+        scenarios (list): names of the scenarios
+
+        seeds (list): seeds of the runs (see :func:`seed_run`)
+
+    Kwargs:
+        parameters (dict): parameter name -> list of values
+
+        results_path (str): each run writes in its own folder inside it
+
+        processes (int): size of the pool. 1 - the runs are executed in this process. By default: the number of CPUs
+
+        summary_file (str): name of the merged summary in *results_path*. None - it is not written
+
+        logger (logger): logger
+
+    Returns:
+        a DataFrame with a row for each run: run, scenario, seed, the parameters, path, status, elapsed, error and
+        the values returned by the function
+    """
+    logger = logger or logging.getLogger(__name__)
+    runs = expand_grid(scenarios, seeds, parameters)
+    for run in runs:
+        run["path"] = _run_path(results_path, run)
+    os.makedirs(results_path, exist_ok=True)
+    for run in runs:
+        if os.path.exists(_marker(run)):
+            # left by a previous execution of the grid
+            os.remove(_marker(run))
+
+    results = {}
+    if processes == 1:
+        for run in runs:
+            results[run["run"]] = _execute(function, run)
+    else:
+        _execute_pool(function, runs, processes, results)
+
+    rows = []
+    for run in runs:
+        result = results[run["run"]]
+        if result["status"] != STATUS_OK:
+            logger.warning("Run %i (%s, seed %i) failed: %s" % (run["run"], run["scenario"], run["seed"],
+                                                                result["error"]))
+        row = {"run": run["run"], "scenario": run["scenario"], "seed": run["seed"]}
+        row.update(run["params"])
+        row.update({"path": run["path"], "status": result["status"], "elapsed": result["elapsed"],
+                    "error": result["error"]})
+        row.update(result["values"])
+        rows.append(row)
+
+    summary = pd.DataFrame(rows)
+    if summary_file is not None:
+        summary.to_csv(os.path.join(results_path, summary_file), index=False)
+    return summary
@@ -1,14 +1,122 @@
 import pandas as pd
 import numpy as np
-
-from yafs.metrics import Metrics
+import os
+
+from yafs.metrics import Metrics, read_binary_trace
+
+
+def _busy_time_by_window(codes, start, end, num_entities, from_time, window, num_windows):
+    """
+    The busy time of each entity in each window [from_time + k * window, from_time + (k + 1) * window).
+    Each interval [start, end) is split across the window boundaries.
+
+    Returns:
+        an array (entities x windows)
+    """
+    to_time = from_time + window * num_windows
+    start = np.clip(start, from_time, to_time)
+    end = np.clip(end, from_time, to_time)
+    keep = end > start
+    codes, start, end = codes[keep], start[keep], end[keep]
+
+    first = np.minimum(((start - from_time) // window).astype(np.int64), num_windows - 1)
+    last = np.minimum(((end - from_time) // window).astype(np.int64), num_windows - 1)
+    row = codes.astype(np.int64) * num_windows
+    size = num_entities * num_windows
+
+    same = first == last
+    busy = np.bincount(row[same] + first[same], weights=(end - start)[same], minlength=size)
+    split = ~same
+    busy += np.bincount(row[split] + first[split],
+                        weights=(from_time + (first[split] + 1) * window) - start[split], minlength=size)
+    busy += np.bincount(row[split] + last[split],
+                        weights=end[split] - (from_time + last[split] * window), minlength=size)
+
+    # whole windows between the first and the last one: +1/-1 marks and a cumulative sum by entity
+    inner = split & (last > first + 1)
+    marks = np.zeros(num_entities * (num_windows + 1))
+    marks += np.bincount(codes[inner] * (num_windows + 1) + first[inner] + 1, minlength=len(marks))
+    marks -= np.bincount(codes[inner] * (num_windows + 1) + last[inner], minlength=len(marks))
+    whole = np.cumsum(marks.reshape(num_entities, num_windows + 1), axis=1)[:, :num_windows] * window
+
+    return busy.reshape(num_entities, num_windows) + whole
+
+
+def _sliding(binned, bins_per_window):
+    """
+    Sums of *bins_per_window* consecutive bins, one for each bin where a window can start
+    """
+    acc = np.cumsum(np.pad(binned, ((0, 0), (1, 0))), axis=1)
+    return acc[:, bins_per_window:] - acc[:, :-bins_per_window]
+
+
+def trace_format_of(path):
+    """
+    Returns:
+        the format of the result file of :class:`yafs.metrics.Metrics` in *path*: *Metrics.FORMAT_BINARY* if only
+        <path>.bin exists or it is newer than <path>.csv (i.e. a CSV left by a previous simulation), otherwise
+        *Metrics.FORMAT_CSV*
+    """
+    if not os.path.exists(path + ".bin"):
+        return Metrics.FORMAT_CSV
+    if os.path.exists(path + ".csv") and os.path.getmtime(path + ".csv") > os.path.getmtime(path + ".bin"):
+        return Metrics.FORMAT_CSV
+    return Metrics.FORMAT_BINARY
+
+
+def read_trace(path, columns=None, chunksize=None, trace_format=None):
+    """
+    It reads a result file of :class:`yafs.metrics.Metrics` in CSV (<path>.csv) or in the binary format (<path>.bin)
+
+    Kwargs:
+        trace_format (str): *Metrics.FORMAT_CSV* or *Metrics.FORMAT_BINARY*. By default: :func:`trace_format_of`
+    """
+    if trace_format is None:
+        trace_format = trace_format_of(path)
+    if trace_format == Metrics.FORMAT_BINARY:
+        return read_binary_trace(path, columns=columns, chunksize=chunksize)
+    if trace_format != Metrics.FORMAT_CSV:
+        raise ValueError("Unknown trace format: %s" % trace_format)
+    return pd.read_csv(path + ".csv", usecols=columns, chunksize=chunksize)
+
+
+def _watt(stats, totaltime, topology, by):
+    """
+    The energy of :meth:`Stats.get_watt`, the service time of the nodes is given by *stats.service_time_by*.
+    The nodes without *WATT* are not reported (i.e. the MEC servers, see :meth:`Stats.energy_report`)
+    """
+    results = {}
+    nodeInfo = topology.get_info()
+    if by == Metrics.WATT_SERVICE:
+        # Tiempo de actividad / runeo
+        nodes = stats.service_time_by("TOPO.dst")
+        for id_node in nodes.index:
+            if "WATT" not in nodeInfo[id_node]:
+                continue
+            results[id_node] = {"model": nodeInfo[id_node].get("model"), "type": nodeInfo[id_node].get("type"),
+                                "watt": nodes.loc[id_node] * nodeInfo[id_node]["WATT"]}
+    else:
+        for node_key in nodeInfo:
+            if "WATT" not in nodeInfo[node_key]:
+                continue
+            start, end = nodeInfo[node_key]["uptime"]
+            if not end:
+                end = totaltime
+            uptime = end-start
+            results[node_key] = {"model":nodeInfo[node_key].get("model"),"type":nodeInfo[node_key].get("type"),
+                                 "watt":uptime*nodeInfo[node_key]["WATT"],"uptime":uptime}
+
+    return results
 
 
 class Stats:
 
-    def __init__(self,defaultPath="result"):
-        self.df_link = pd.read_csv(defaultPath + "_link.csv")
-        self.df = pd.read_csv(defaultPath + ".csv")
+    def __init__(self,defaultPath="result", trace_format=None):
+        # both files are read in the format of the events, see trace_format_of
+        trace_format = trace_format or trace_format_of(defaultPath)
+        self.df_link = read_trace(defaultPath + "_link", trace_format=trace_format)
+        self.df = read_trace(defaultPath, trace_format=trace_format)
+        self.__message_codes = None
 
 
     def bytes_transmitted(self):
@@ -18,10 +126,17 @@ class Stats:
         return len(self.df_link)
 
 
-    def utilization(self,id_entity, total_time, from_time=0.0):
+    def service_time_by(self, key):
+        """
+        Returns:
+            a Series with the total service time of each value of the *key* column (i.e. "DES.dst", "TOPO.dst")
+        """
         if "time_service" not in self.df.columns: #cached
             self.df["time_service"] = self.df.time_out - self.df.time_in
-        values = self.df.groupby("DES.dst").time_service.agg("sum")
+        return self.df.groupby(key, observed=True).time_service.agg("sum")
+
+    def utilization(self,id_entity, total_time, from_time=0.0):
+        values = self.service_time_by("DES.dst")
         return values[id_entity] / total_time
 
     def compute_times_df(self):
@@ -34,54 +149,314 @@ class Stats:
     def times(self,time,value="mean"):
         if "time_response" not in self.df.columns:
             self.compute_times_df()
-        return self.df.groupby("message").agg({time:value})
+        return self.df.groupby("message", observed=True).agg({time:value})
 
 
 
+    def message_codes(self):
+        """
+        Returns:
+            the integer code of the message of each event and the index of message names. It is computed once.
+        """
+        if self.__message_codes is None:
+            self.__message_codes = pd.factorize(self.df.message)
+        return self.__message_codes
+
     def average_loop_response(self,time_loops):
         """
         No hay chequeo de la existencia del loop: user responsability
+
+        The messages that are not in the results add 0 to the loop.
         """
         if "time_response" not in self.df.columns:
             self.compute_times_df()
 
-        resp_msg = self.df.groupby("message").agg({"time_total_response": ["mean","count"]}) #Its not necessary to have "count"
-        resp_msg.columns = ['_'.join(col).strip() for col in resp_msg.columns.values]
+        codes, names = self.message_codes()
+        values = self.df.time_total_response.values
+        valid = (codes >= 0) & ~np.isnan(values)
+        sums = np.bincount(codes[valid], weights=values[valid], minlength=len(names))
+        counts = np.bincount(codes[valid], minlength=len(names))
+        means = np.divide(sums, counts, out=np.zeros(len(names)), where=counts > 0)
+
+        # all the messages of all the loops are looked up at once
+        loop_messages = [msg for loop in time_loops for msg in loop]
+        loop_index = np.repeat(np.arange(len(time_loops)), [len(loop) for loop in time_loops])
+        positions = names.get_indexer(loop_messages)
+        loop_values = np.where(positions >= 0, means[positions], 0.0)
+        totals = np.bincount(loop_index, weights=loop_values, minlength=len(time_loops))
+        return [float(total) for total in totals]
+
+    def loop_response_by_request(self, time_loops):
+        """
+        The end-to-end latency of each request (message *id*) in each loop: from the emission of the first message of
+        the loop to the end of the processing of the last one. Only the requests that have all the messages of the loop
+        are included.
+
+        Args:
+            time_loops (list): a list of loops, a loop is a list of message names
+
+        Returns:
+            a DataFrame with the columns: loop (index of the loop), id, time_emit, time_out and response
+        """
+        codes, names = self.message_codes()
         results = []
+        for i, loop in enumerate(time_loops):
+            loop_codes = np.unique(names.get_indexer(list(loop)))
+            if len(loop_codes) < len(set(loop)) or (loop_codes < 0).any():
+                # some message of the loop is not in the results
+                continue
+            mask = np.isin(codes, loop_codes)
+            selected = self.df.loc[mask, ["id", "time_emit", "time_out"]].assign(code=codes[mask])
+            g = selected.groupby("id").agg(time_emit=("time_emit", "min"), time_out=("time_out", "max"),
+                                           messages=("code", "nunique"))
+            g = g[g.messages == len(loop_codes)]
+            results.append(pd.DataFrame({"loop": i, "id": g.index.values, "time_emit": g.time_emit.values,
+                                         "time_out": g.time_out.values}))
+        if results:
+            result = pd.concat(results, ignore_index=True)
+        else:
+            result = pd.DataFrame(columns=["loop", "id", "time_emit", "time_out"])
+        result["response"] = result.time_out - result.time_emit
+        return result
 
-        for loop in time_loops:
-            total = 0.0
-            for msg in loop:
-                try:
-                    total += resp_msg[resp_msg.index == msg].time_total_response_mean[0]
-                except IndexError:
-                    total +=0
+    def request_response_times(self, deadline=None, keep="all"):
+        """
+        It reconstructs each request (message *id*) from the events with one sort and a segmented reduction.
 
-            results.append(total)
+        Args:
+            deadline (float): if it is given, the column *deadline_met* shows if the response time is lower or equal
 
-        return results
+            keep (str): "all", "met" or "missed" requests regarding the deadline
 
-    def get_watt(self,totaltime,topology,by=Metrics.WATT_SERVICE):
-        results = {}
-        nodeInfo = topology.get_info()
-        if by == Metrics.WATT_SERVICE:
-            # Tiempo de actividad / runeo
-            if "time_response" not in self.df.columns:  # cached
-                self.compute_times_df()
-
-            nodes = self.df.groupby("TOPO.dst").agg({"time_service": "sum"})
-            for id_node in nodes.index:
-                results[id_node] = {"model": nodeInfo[id_node]["model"], "type": nodeInfo[id_node]["type"],
-                                 "watt": nodes.loc[id_node].time_service * nodeInfo[id_node]["WATT"]}
+        Returns:
+            a DataFrame with the columns: id, app, time_emit (first emission), time_completion (last processing end),
+            hops (number of processings), completed (the request reached a sink) and response
+        """
+        ids = self.df.id.values
+        valid = ids >= 0  # the messages of module sources have not id
+        order = np.argsort(ids[valid], kind="stable")
+        sorted_ids = ids[valid][order]
+        if len(sorted_ids) == 0:
+            result = pd.DataFrame({"id": [], "app": [], "time_emit": [], "time_completion": [], "hops": [],
+                                   "completed": []})
         else:
-            for node_key in nodeInfo:
-                if not nodeInfo[node_key]["uptime"][1]:
-                    end = totaltime
-                start = nodeInfo[node_key]["uptime"][0]
-                uptime = end-start
-                results[node_key] = {"model":nodeInfo[node_key]["model"],"type":nodeInfo[node_key]["type"],"watt":uptime*nodeInfo[node_key]["WATT"],"uptime":uptime}
+            starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+            is_sink = (self.df.type.values[valid][order] == "SINK_M").astype(np.int8)
+            result = pd.DataFrame({
+                "id": sorted_ids[starts],
+                "app": self.df.app.values[valid][order][starts],
+                "time_emit": np.minimum.reduceat(self.df.time_emit.values[valid][order], starts),
+                "time_completion": np.maximum.reduceat(self.df.time_out.values[valid][order], starts),
+                "hops": np.diff(np.r_[starts, len(sorted_ids)]),
+                "completed": np.maximum.reduceat(is_sink, starts).astype(bool)})
+        result["response"] = result.time_completion - result.time_emit
+
+        if deadline is not None:
+            result["deadline_met"] = result.response <= deadline
+            if keep == "met":
+                result = result[result.deadline_met]
+            elif keep == "missed":
+                result = result[~result.deadline_met]
+        return result
+
+    def __windows(self, window, total_time, from_time, step):
+        """
+        Returns:
+            the bin size, the number of bins and the number of bins in a window
+        """
+        if step is None:
+            step = window
+        bins_per_window = int(round(window / step))
+        if not np.isclose(bins_per_window * step, window):
+            raise ValueError("The window must be a multiple of the step")
+        num_bins = max(int(np.ceil((total_time - from_time) / step)), bins_per_window)
+        return step, num_bins, bins_per_window
+
+    def __windowed_matrix(self, entities, binned, window, from_time, step, bins_per_window):
+        values = _sliding(binned, bins_per_window) / window
+        columns = from_time + np.arange(values.shape[1]) * step
+        return pd.DataFrame(values, index=entities, columns=pd.Index(columns, name="time"))
+
+    def windowed_utilization(self, window, total_time, from_time=0.0, by="TOPO.dst", slots=None, step=None):
+        """
+        The utilization of each entity over time windows. The processing intervals [time_in, time_out) are split
+        across the window boundaries.
 
-        return results
+        Args:
+            window (float): size of the window
+
+            total_time (float): end of the analysed period
+
+        Kwargs:
+            from_time (float): start of the analysed period
+
+            by (str): column of the entity, i.e. "TOPO.dst" (nodes), "DES.dst" (DES processes) or "module"
+
+            slots (dict): entity -> number of slots, the utilization is divided by them
+
+            step (float): windows start every *step* (sliding windows). By default, windows do not overlap
+
+        Returns:
+            a DataFrame (entities x windows) with the busy fraction, the columns are the start time of each window
+        """
+        step, num_bins, bins_per_window = self.__windows(window, total_time, from_time, step)
+        codes, entities = pd.factorize(self.df[by])
+        binned = _busy_time_by_window(codes, self.df.time_in.values, self.df.time_out.values, len(entities),
+                                      from_time, step, num_bins)
+        result = self.__windowed_matrix(entities, binned, window, from_time, step, bins_per_window)
+        if slots is not None:
+            result = result.div(pd.Series(slots).reindex(result.index).fillna(1), axis=0)
+        return result
+
+    def windowed_link_utilization(self, window, total_time, from_time=0.0, step=None):
+        """
+        The utilization of each link (src, dst) over time windows: the fraction of time that it is transmitting
+        (see :meth:`windowed_utilization`)
+        """
+        step, num_bins, bins_per_window = self.__windows(window, total_time, from_time, step)
+        links = pd.MultiIndex.from_arrays([self.df_link.src.values, self.df_link.dst.values], names=["src", "dst"])
+        codes, entities = pd.factorize(links)
+        start = self.df_link.ctime.values.astype(float)
+        if "shift" in self.df_link.columns:
+            # the message waits until the link is free
+            start = start + self.df_link["shift"].values
+        binned = _busy_time_by_window(codes, start, start + self.df_link.latency.values, len(entities),
+                                      from_time, step, num_bins)
+        return self.__windowed_matrix(entities, binned, window, from_time, step, bins_per_window)
+
+    def windowed_throughput(self, window, total_time, from_time=0.0, step=None):
+        """
+        The bytes transmitted by each link (src, dst) in each time window, by the start time of the transmission
+
+        Returns:
+            a DataFrame (links x windows), the columns are the start time of each window
+        """
+        step, num_bins, bins_per_window = self.__windows(window, total_time, from_time, step)
+        links = pd.MultiIndex.from_arrays([self.df_link.src.values, self.df_link.dst.values], names=["src", "dst"])
+        codes, entities = pd.factorize(links)
+        ctime = self.df_link.ctime.values.astype(float)
+        keep = (ctime >= from_time) & (ctime < from_time + num_bins * step)
+        bins = ((ctime[keep] - from_time) // step).astype(np.int64)
+        binned = np.bincount(codes[keep] * num_bins + bins, weights=self.df_link["size"].values[keep],
+                             minlength=len(entities) * num_bins).reshape(len(entities), num_bins)
+        # the matrix is divided by the window later, so it is scaled here to keep the bytes
+        return self.__windowed_matrix(entities, binned * window, window, from_time, step, bins_per_window)
+
+    def link_shift(self):
+        """
+        Returns:
+            the waiting time of each transmission in the queue of its link. Older traces without the *shift* column
+            are replayed as the simulator does: a link transmits one message after the other.
+        """
+        if "shift" not in self.df_link.columns:
+            last_busy = {}
+            shift = np.zeros(len(self.df_link))
+            links = zip(self.df_link.src.values, self.df_link.dst.values, self.df_link.ctime.values,
+                        self.df_link.latency.values)
+            for i, (src, dst, ctime, latency) in enumerate(links):
+                last_used = last_busy.get((src, dst), 0.0)
+                if last_used >= ctime:
+                    shift[i] = last_used - ctime
+                last_busy[(src, dst)] = ctime + shift[i] + latency
+            self.df_link["shift"] = shift
+        return self.df_link["shift"].values
+
+    def link_congestion(self, total_time, from_time=0.0):
+        """
+        A congestion report of each link (src, dst) computed in one pass over the link trace
+
+        Args:
+            total_time (float): end of the analysed period
+
+        Kwargs:
+            from_time (float): start of the analysed period, by the start time of the transmissions
+
+        Returns:
+            a DataFrame indexed by link with the columns: messages, bytes, queue_delay_mean, queue_delay_max,
+            busy_time and busy_fraction
+        """
+        shift = self.link_shift()
+        ctime = self.df_link.ctime.values
+        keep = (ctime >= from_time) & (ctime < total_time)
+        links = pd.MultiIndex.from_arrays([self.df_link.src.values[keep], self.df_link.dst.values[keep]],
+                                          names=["src", "dst"])
+        codes, entities = pd.factorize(links)
+        n = len(entities)
+        messages = np.bincount(codes, minlength=n)
+        queue_delay = shift[keep]
+        queue_delay_max = np.zeros(n)
+        np.maximum.at(queue_delay_max, codes, queue_delay)
+        busy_time = np.bincount(codes, weights=self.df_link.latency.values[keep], minlength=n)
+        return pd.DataFrame({"messages": messages,
+                             "bytes": np.bincount(codes, weights=self.df_link["size"].values[keep], minlength=n),
+                             "queue_delay_mean": np.bincount(codes, weights=queue_delay, minlength=n) / messages,
+                             "queue_delay_max": queue_delay_max,
+                             "busy_time": busy_time,
+                             "busy_fraction": busy_time / (total_time - from_time)}, index=entities)
+
+    def top_congested_links(self, k, total_time, from_time=0.0, by="queue_delay_mean"):
+        """
+        Returns:
+            the *k* links with the highest value of the column *by* of :meth:`link_congestion`
+        """
+        return self.link_congestion(total_time, from_time).nlargest(k, by)
+
+    def get_watt(self,totaltime,topology,by=Metrics.WATT_SERVICE):
+        return _watt(self, totaltime, topology, by)
+
+    def energy_report(self, window, total_time, topology, from_time=0.0, groups=None):
+        """
+        The energy of the nodes with a linear power model: *POWERmin* when idle and *POWERmax* when all its slots
+        (*Topology.NODE_SLOT*) are busy. The utilization is computed in windows (see :meth:`windowed_utilization`)
+        and limited to 1 in each of them.
+
+        Args:
+            window (float): size of the windows
+
+            total_time (float): end of the analysed period
+
+            topology (Topology): only the nodes with *POWERmin* and *POWERmax* are reported (i.e. the MEC servers)
+
+        Kwargs:
+            from_time (float): start of the analysed period
+
+            groups (dict): node id -> group, i.e. the MDC of each server (see MEC.map_entities_to_mdc)
+
+        Returns:
+            a DataFrame indexed by node with the columns power_min, power_max, busy (time at full load), utilization,
+            energy and
+            group (if *groups* is given)
+        """
+        nodeInfo = topology.get_info()
+        ids = [key for key, attr in nodeInfo.items() if "POWERmin" in attr and "POWERmax" in attr]
+        power_min = np.array([nodeInfo[key]["POWERmin"] for key in ids], dtype=float)
+        power_max = np.array([nodeInfo[key]["POWERmax"] for key in ids], dtype=float)
+        slots = {key: topology.get_slots(key) for key in ids}
+
+        utilization = self.windowed_utilization(window, total_time, from_time=from_time, slots=slots)
+        utilization = utilization.reindex(ids).fillna(0.0)
+        # the last window can end after total_time
+        duration = np.clip(total_time - utilization.columns.values, 0.0, window)
+        busy = np.minimum(utilization.values * window, duration[None, :]).sum(axis=1)
+
+        period = total_time - from_time
+        report = pd.DataFrame({"power_min": power_min, "power_max": power_max, "busy": busy,
+                               "utilization": busy / period if period > 0 else 0.0,
+                               "energy": power_min * period + (power_max - power_min) * busy},
+                              index=pd.Index(ids, name="TOPO.dst"))
+        if groups is not None:
+            report["group"] = [groups.get(key) for key in ids]
+        return report
+
+    def energy_report_by_group(self, window, total_time, topology, groups, from_time=0.0):
+        """
+        Returns:
+            a DataFrame indexed by group (i.e. MDC) with the energy, the busy time and the number of nodes,
+            see :meth:`energy_report`
+        """
+        report = self.energy_report(window, total_time, topology, from_time=from_time, groups=groups)
+        return report.groupby("group").agg(energy=("energy", "sum"), busy=("busy", "sum"),
+                                           nodes=("energy", "count"))
 
     # def get_cost_cloud(self, topology):
     #     cost = 0.0
@@ -165,14 +540,14 @@ class Stats:
         return self.df_link.buffer[-1:]
 
     def get_df_modules(self):
-        g = self.df.groupby(["module", "DES.dst"]).agg({"service": ['mean', 'sum', 'count']})
+        g = self.df.groupby(["module", "DES.dst"], observed=True).agg({"service": ['mean', 'sum', 'count']})
         return g.reset_index()
 
     def get_df_service_utilization(self,service,time):
         """
         Returns the utilization(%) of a specific module
         """
-        g = self.df.groupby(["module", "DES.dst"]).agg({"service": ['mean', 'sum', 'count']})
+        g = self.df.groupby(["module", "DES.dst"], observed=True).agg({"service": ['mean', 'sum', 'count']})
         g.reset_index(inplace=True)
         h = pd.DataFrame()
         h["module"] = g[g.module == service].module
@@ -180,3 +555,132 @@ class Stats:
         return h
 
 
+def _moments(df, key, column):
+    """
+    Partial aggregates of a chunk that can be merged with :func:`_merge_moments`
+    """
+    g = df.groupby(key, observed=True)[column]
+    part = pd.DataFrame({"count": g.count(), "sum": g.sum(), "min": g.min(), "max": g.max()})
+    part["m2"] = (g.var(ddof=0) * part["count"]).fillna(0.0)
+    return part
+
+
+def _merge_moments(acc, part):
+    if acc is None:
+        return part
+    index = acc.index.union(part.index)
+    fill = {"count": 0, "sum": 0.0, "min": np.inf, "max": -np.inf, "m2": 0.0}
+    a = acc.reindex(index).fillna(fill)
+    b = part.reindex(index).fillna(fill)
+    n = a["count"] + b["count"]
+    mean_a = (a["sum"] / a["count"].where(a["count"] > 0)).fillna(0.0)
+    mean_b = (b["sum"] / b["count"].where(b["count"] > 0)).fillna(0.0)
+    delta = mean_b - mean_a
+    result = pd.DataFrame({"count": n, "sum": a["sum"] + b["sum"],
+                           "min": np.minimum(a["min"], b["min"]), "max": np.maximum(a["max"], b["max"])})
+    result["m2"] = a["m2"] + b["m2"] + (delta ** 2 * a["count"] * b["count"] / n.where(n > 0)).fillna(0.0)
+    result["count"] = result["count"].astype(np.int64)
+    return result
+
+
+class StreamingStats:
+    """
+    The analysis of :class:`Stats` computed over chunks of the result files with mergeable partial aggregates
+    (count, sum, min, max and the sum of squared deviations), so large traces are never loaded in memory.
+    The results are the same than the in-memory version up to floating point rounding.
+
+    Only the queries with mergeable aggregates are available; the other analyses need :class:`Stats`.
+
+    Args:
+        defaultPath (str): the path of the result files without extension
+
+        chunksize (int): number of rows read in each chunk
+
+        trace_format (str): *Metrics.FORMAT_CSV* or *Metrics.FORMAT_BINARY*. By default: :func:`trace_format_of`
+    """
+
+    AGGREGATIONS = ("mean", "sum", "count", "min", "max", "var", "std")
+
+    def __init__(self, defaultPath="result", chunksize=1000000, trace_format=None):
+        self.defaultPath = defaultPath
+        self.chunksize = chunksize
+        self.trace_format = trace_format or trace_format_of(defaultPath)
+
+    def chunks(self, columns=None, link=False):
+        """
+        It iterates the result file (or the link result file) in chunks of DataFrames with only the *columns*
+        """
+        path = self.defaultPath + ("_link" if link else "")
+        return read_trace(path, columns=columns, chunksize=self.chunksize, trace_format=self.trace_format)
+
+    def bytes_transmitted(self):
+        total = 0
+        for chunk in self.chunks(["size"], link=True):
+            total += chunk["size"].sum()
+        return total
+
+    def count_messages(self):
+        total = 0
+        for chunk in self.chunks(["id"], link=True):
+            total += len(chunk)
+        return total
+
+    def service_time_by(self, key):
+        total = None
+        for chunk in self.chunks([key, "time_in", "time_out"]):
+            chunk["time_service"] = chunk.time_out - chunk.time_in
+            part = chunk.groupby(key, observed=True).time_service.agg("sum")
+            total = part if total is None else total.add(part, fill_value=0.0)
+        if total is None:
+            return pd.Series(dtype=float, name="time_service")
+        return total.sort_index()
+
+    def utilization(self, id_entity, total_time, from_time=0.0):
+        values = self.service_time_by("DES.dst")
+        return values[id_entity] / total_time
+
+    def get_watt(self, totaltime, topology, by=Metrics.WATT_SERVICE):
+        return _watt(self, totaltime, topology, by)
+
+    def aggregate_times(self, time):
+        """
+        Returns:
+            a DataFrame indexed by message with the merged partial aggregates of the *time* column
+        """
+        acc = None
+        for chunk in self.chunks(["message", "time_in", "time_out", "time_emit", "time_reception"]):
+            chunk["time_latency"] = chunk["time_reception"] - chunk["time_emit"]
+            chunk["time_wait"] = chunk["time_in"] - chunk["time_reception"]
+            chunk["time_service"] = chunk["time_out"] - chunk["time_in"]
+            chunk["time_response"] = chunk["time_out"] - chunk["time_reception"]
+            chunk["time_total_response"] = chunk["time_response"] + chunk["time_latency"]
+            acc = _merge_moments(acc, _moments(chunk, "message", time))
+        if acc is None:
+            acc = pd.DataFrame(columns=["count", "sum", "min", "max", "m2"])
+        return acc.sort_index()
+
+    def times(self, time, value="mean"):
+        if value not in self.AGGREGATIONS:
+            raise ValueError("Aggregation %s is not mergeable, use one of %s" % (value, self.AGGREGATIONS))
+        acc = self.aggregate_times(time)
+        count = acc["count"].where(acc["count"] > 0)
+        if value == "mean":
+            result = acc["sum"] / count
+        elif value == "var":
+            result = acc["m2"] / (count - 1)
+        elif value == "std":
+            result = np.sqrt(acc["m2"] / (count - 1))
+        else:
+            result = acc[value]
+        result.index.name = "message"
+        return result.to_frame(time)
+
+    def average_loop_response(self, time_loops):
+        resp_msg = self.times("time_total_response")["time_total_response"]
+        results = []
+        for loop in time_loops:
+            total = 0.0
+            for msg in loop:
+                total += resp_msg.get(msg, 0.0)
+            results.append(float(total))
+        return results
@@ -2,6 +2,8 @@
 import logging
 
 
+import heapq
+import itertools
 import networkx as nx
 import warnings
 
@@ -23,6 +25,9 @@ class Topology:
     NODE_IPT = "IPT"
     "Node feature: IPS . Instructions per Simulation Time "
 
+    NODE_SLOT = "slot"
+    "Node feature: number of processing slots (i.e. cores) that can serve modules concurrently, a positive integer"
+
 
 
     def __init__(self, logger=None):
@@ -32,12 +37,52 @@ class Topology:
         self.nodeAttributes = {}
         self.logger = logger or logging.getLogger(__name__)
 
+        self.__attribute_index = {}
+        # attribute -> value -> list of node ids (in the order of nodeAttributes). Built on first search
+        self.__node_position = None
+        # node id -> position in nodeAttributes
+        self.__removed = set()
+        # removed nodes keep their attributes but they are not indexed
+
 
 
 
     def __init_uptimes(self):
         for key in self.nodeAttributes:
             self.nodeAttributes[key]["uptime"] = (0, None)
+        self.__removed = set()
+        self.reindex()
+
+    def reindex(self):
+        """
+        It discards the attribute index of :meth:`find_IDs`. It is required when *nodeAttributes* is modified
+        directly instead of using the topology functions
+        """
+        self.__attribute_index = {}
+        self.__node_position = None
+
+    def __positions(self):
+        if self.__node_position is None:
+            self.__node_position = {key: i for i, key in enumerate(self.nodeAttributes)}
+        return self.__node_position
+
+    def __index(self, attribute):
+        """
+        Returns:
+            a dict value -> list of node ids with that value of the attribute
+        """
+        if attribute not in self.__attribute_index:
+            index = {}
+            for key, attributes in self.nodeAttributes.items():
+                if attribute in attributes and key not in self.__removed:
+                    try:
+                        index.setdefault(attributes[attribute], []).append(key)
+                    except TypeError:
+                        # unhashable values (i.e. lists) cannot be indexed
+                        self.__attribute_index[attribute] = None
+                        return None
+            self.__attribute_index[attribute] = index
+        return self.__attribute_index[attribute]
 
     def get_edges(self):
         """
@@ -77,6 +122,24 @@ class Topology:
     def get_info(self):
         return self.nodeAttributes
 
+    def get_slots(self, id_node):
+        """
+        Args:
+            id_node (int): a node identifier
+
+        Returns:
+            int: the number of processing slots of the node (*NODE_SLOT*), 1 if it is not defined
+
+        Raises:
+            ValueError: the number of slots is not an integer or it is lower than 1
+        """
+        slots = self.nodeAttributes.get(id_node, {}).get(self.NODE_SLOT)
+        if slots is None:
+            return 1
+        if slots != int(slots) or slots < 1:
+            raise ValueError("Node %s: the number of slots has to be a positive integer, not %s" % (id_node, slots))
+        return int(slots)
+
     def create_topology_from_graph(self, G):
         """
         It generates the topology from a NetworkX graph
@@ -186,6 +249,7 @@ class Topology:
         nx.set_node_attributes(self.G, values=attNodes)
         for k in self.G.nodes():
             self.nodeAttributes[k] = self.G.node[k] #it has "id" att. TODO IMPROVE
+        self.reindex()
 
 
     def get_nodes_att(self):
@@ -204,17 +268,47 @@ class Topology:
 
         Returns:
             A list with the ID of each node that have the same attribute that the value.value
+
+        .. note:: The search uses an index of the attribute, :meth:`reindex` is required after modifying
+            *nodeAttributes* directly (the topology functions keep it updated)
         """
         keyS = list(value.keys())[0]
 
+        index = self.__index(keyS)
+        if index is not None:
+            try:
+                return list(index.get(value[keyS], []))
+            except TypeError:
+                pass
+
         result = []
         for key in self.nodeAttributes.keys():
             val = self.nodeAttributes[key]
-            if keyS in val:
+            if keyS in val and key not in self.__removed:
                 if value[keyS] == val[keyS]:
                     result.append(key)
         return result
 
+    def find_IDs_in(self, attribute, values):
+        """
+        Search for nodes whose attribute has any of the values
+
+        Args:
+            attribute (str): i.e. "model"
+
+            values (list): the values searched
+
+        Returns:
+            A list with the ID of each node, in the same order than *nodeAttributes*
+
+        .. note:: As :meth:`find_IDs`, it requires :meth:`reindex` after modifying *nodeAttributes* directly
+        """
+        lists = [self.find_IDs({attribute: v}) for v in set(values)]
+        if len(lists) == 1:
+            return lists[0]
+        position = self.__positions()
+        return list(heapq.merge(*lists, key=lambda key: position[key]))
+
 
     def size(self):
         """
@@ -223,7 +317,7 @@ class Topology:
         """
         return len(self.G.nodes)
 
-    def add_node(self, nodes, edges=None):
+    def add_node(self, nodes, edges=None, attributes=None):
         """
         Add a list of nodes in the topology
 
@@ -231,11 +325,32 @@ class Topology:
             nodes (list): a list of identifiers
 
             edges (list): a list of destination edges
+
+        Kwargs:
+            attributes (dict): the attributes of the new node (see *nodeAttributes*), they are also the attributes
+            of the node in *G* (i.e. its IPT)
+
+        Returns:
+            the identifier of the new node, a new one greater than any other (also the removed ones)
         """
-        self.__idNode = + 1
-        self.G.add_node(self.__idNode)
+        ids = [id_node for id_node in itertools.chain(self.G.nodes, self.nodeAttributes) if isinstance(id_node, int)]
+        self.__idNode = max(ids, default=-1) + 1
+        self.G.add_node(self.__idNode, **(attributes or {}))
         self.G.add_edges_from(zip(nodes, [self.__idNode] * len(nodes)))
 
+        if attributes is not None:
+            self.nodeAttributes[self.__idNode] = attributes
+            self.__removed.discard(self.__idNode)
+            attributes.setdefault("uptime", (0, None))
+            if self.__node_position is not None:
+                self.__node_position[self.__idNode] = len(self.__node_position)
+            for attribute, index in self.__attribute_index.items():
+                if index is not None and attribute in attributes:
+                    try:
+                        index.setdefault(attributes[attribute], []).append(self.__idNode)
+                    except TypeError:
+                        self.__attribute_index[attribute] = None
+
         return self.__idNode
 
     def remove_node(self, id_node):
@@ -247,6 +362,14 @@ class Topology:
         """
 
         self.G.remove_node(id_node)
+        # the attributes are kept (i.e. the uptime) but the node is not found any more
+        self.__removed.add(id_node)
+        attributes = self.nodeAttributes.get(id_node, {})
+        for attribute, index in self.__attribute_index.items():
+            if index is not None and attribute in attributes:
+                ids = index.get(attributes[attribute], [])
+                if id_node in ids:
+                    ids.remove(id_node)
         return self.size()
 
 